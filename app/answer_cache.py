@@ -0,0 +1,126 @@
+"""
+Semantic answer cache for the core agent.
+Stores previously generated answers keyed by question embedding so that
+paraphrased questions can be answered without running the graph again.
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """A cached answer and the normalized embedding of its question"""
+
+    question: str
+    embedding: np.ndarray
+    result: Dict[str, Any]
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """Bounded LRU/TTL cache looked up by cosine similarity of question embeddings"""
+
+    def __init__(
+        self,
+        max_size: int = 512,
+        ttl_seconds: float = 3600.0,
+        similarity_threshold: float = 0.95,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._next_key = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.ndim != 1 or norm == 0:
+            raise ValueError("Embedding must be a non-zero vector")
+        return vector / norm
+
+    def _expire(self):
+        """Drop entries older than the TTL"""
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [k for k, e in self._entries.items() if e.created_at < cutoff]
+        for key in expired:
+            del self._entries[key]
+        self.evictions += len(expired)
+
+    def lookup(self, embedding: List[float]) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (cached result, similarity) for the closest entry above threshold"""
+        self._expire()
+
+        if not self._entries:
+            self.misses += 1
+            return None
+
+        query = self._normalize(embedding)
+        keys = list(self._entries.keys())
+        matrix = np.stack([self._entries[k].embedding for k in keys])
+        similarities = matrix @ query
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+
+        if similarity < self.similarity_threshold:
+            self.misses += 1
+            return None
+
+        key = keys[best]
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._entries[key].result, similarity
+
+    def store(self, question: str, embedding: List[float], result: Dict[str, Any]):
+        """Add an answer, evicting the least recently used entry when full"""
+        if self.max_size <= 0:
+            return
+
+        self._entries[self._next_key] = CacheEntry(
+            question=question,
+            embedding=self._normalize(embedding),
+            result=result,
+            created_at=time.monotonic(),
+        )
+        self._next_key += 1
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        """Drop every entry, e.g. after the knowledge base was re-ingested"""
+        if self._entries:
+            logger.info(f"Invalidating {len(self._entries)} cached answers")
+        self._entries.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,98 @@
+"""
+Circuit breakers for the agent's external dependencies.
+After repeated failures a breaker opens and callers fail fast instead of
+retrying against a struggling backend; once the reset timeout passes a
+single half-open probe decides whether to close it again.
+"""
+
+import time
+import logging
+from enum import Enum
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    """Circuit breaker state"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing"""
+
+    def __init__(
+        self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected outright (no state change)"""
+        return (
+            self.state == CircuitState.OPEN
+            and time.monotonic() - self.opened_at < self.reset_timeout
+        ) or (self.state == CircuitState.HALF_OPEN and self._probe_in_flight)
+
+    def allow_request(self) -> bool:
+        """Decide whether a call may proceed, moving OPEN to HALF_OPEN when due"""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            logger.info(f"Circuit '{self.name}' half-open, probing")
+            self.state = CircuitState.HALF_OPEN
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                return False
+            self._probe_in_flight = True
+
+        return True
+
+    def record_success(self):
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+
+        if (
+            self.state == CircuitState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != CircuitState.OPEN:
+                logger.warning(
+                    f"Circuit '{self.name}' opened after "
+                    f"{self.consecutive_failures} consecutive failures"
+                )
+                self.times_opened += 1
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """Give up a half-open probe whose call was cancelled before finishing"""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,73 @@
+"""
+Blue/green collection versions behind an alias.
+Re-indexing builds a new `<name>_v<N>` collection next to the live one and
+then repoints the alias, so the agent never queries a half-built index.
+Chroma has no native aliases; the pointer lives in the metadata of a small
+`<name>__alias` collection, and a metadata update is a single atomic write.
+"""
+
+import re
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def alias_name(name: str) -> str:
+    return f"{name}__alias"
+
+
+def version_name(name: str, version: int) -> str:
+    return f"{name}_v{version}"
+
+
+def list_versions(client, name: str) -> List[Tuple[int, str]]:
+    """(version, collection name) of every versioned collection, oldest first"""
+    pattern = re.compile(rf"^{re.escape(name)}_v(\d+)$")
+    versions = []
+    for collection in client.list_collections():
+        match = pattern.match(collection.name)
+        if match:
+            versions.append((int(match.group(1)), collection.name))
+    return sorted(versions)
+
+
+def read_alias(client, name: str) -> Optional[str]:
+    """Collection the alias points at, or None if no alias exists yet"""
+    try:
+        alias = client.get_collection(alias_name(name))
+    except Exception:
+        return None
+    target = (alias.metadata or {}).get("target")
+    return target if isinstance(target, str) and target else None
+
+
+def resolve_collection(client, name: str) -> str:
+    """Name of the live collection: the alias target, else the plain name"""
+    return read_alias(client, name) or name
+
+
+def switch_alias(client, name: str, target: str):
+    """Atomically point the alias at target"""
+    alias = client.get_or_create_collection(alias_name(name))
+    alias.modify(metadata={"target": target, "switched_at": datetime.now().isoformat()})
+    logger.info(f"Alias '{name}' now points at '{target}'")
+
+
+def garbage_collect(client, name: str, keep: int = 2) -> List[str]:
+    """Delete all but the newest `keep` versions, never the live one
+
+    A pre-versioning collection with the plain name is removed as well once
+    the alias points elsewhere. Returns the names of deleted collections.
+    """
+    live = resolve_collection(client, name)
+    versions = [v for _, v in list_versions(client, name)]
+    doomed = [v for v in versions[: max(len(versions) - keep, 0)] if v != live]
+    if live != name and name in {c.name for c in client.list_collections()}:
+        doomed.append(name)
+
+    for collection_name in doomed:
+        client.delete_collection(name=collection_name)
+        logger.info(f"Deleted old collection '{collection_name}'")
+    return doomed
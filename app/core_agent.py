@@ -7,21 +7,34 @@ with comprehensive async support and error handling.
 import os
 import json
 import asyncio
+import functools
+import random
+import re
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, TypedDict, Optional, Any
+from typing import List, Dict, TypedDict, Optional, Any, Tuple, Callable, Awaitable
 from enum import Enum
 import logging
 
+import httpx
 from langchain.schema import Document
 from langchain.prompts import PromptTemplate, ChatPromptTemplate
-from langchain_community.chat_models import ChatOllama
+from langchain_ollama import ChatOllama
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import Chroma
 import chromadb
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from langchain_core.runnables import RunnableConfig
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langgraph.graph import END, StateGraph
 
+from . import metrics
+from .answer_cache import SemanticAnswerCache
+from .circuit_breaker import CircuitBreaker
+from .collection_alias import resolve_collection
+from .embedding_cache import CachedEmbeddings, EmbeddingStore
 from .gdrive_utils import upload_qa_to_drive
 
 # Configure logging
@@ -42,9 +55,21 @@ class Config:
     # LLM Configuration
     OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+    OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "32"))
+    OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
 
     # Embeddings
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+    # Persistent embedding cache, shared with scripts/ingest.py
+    EMBEDDING_CACHE_ENABLED = (
+        os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    )
+    EMBEDDING_CACHE_PATH = os.getenv(
+        "EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite3"
+    )
+    EMBEDDING_CACHE_MAX_ENTRIES = int(
+        os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000")
+    )
 
     # External Services
     TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
@@ -55,7 +80,30 @@ class Config:
     LANGUAGE = os.getenv("AGENT_LANGUAGE", "zh-TW")  # zh-TW or en
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
     RETRY_DELAY = float(os.getenv("RETRY_DELAY", "1.0"))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
     WEB_SEARCH_RESULTS = int(os.getenv("WEB_SEARCH_RESULTS", "3"))
+    RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "3"))
+    RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+    # Relevance score policy: accept without the LLM grader at or above
+    # GRADE_ACCEPT_SCORE, go straight to web search below GRADE_REJECT_SCORE
+    GRADE_ACCEPT_SCORE = float(os.getenv("GRADE_ACCEPT_SCORE", "0.85"))
+    GRADE_REJECT_SCORE = float(os.getenv("GRADE_REJECT_SCORE", "0.30"))
+    # Run web search concurrently with grading instead of after a "no" grade
+    SPECULATIVE_WEB_SEARCH = (
+        os.getenv("SPECULATIVE_WEB_SEARCH", "false").lower() == "true"
+    )
+
+    # Semantic Answer Cache
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+    # Share one graph run between concurrent identical questions
+    COALESCE_QUESTIONS = os.getenv("COALESCE_QUESTIONS", "true").lower() == "true"
+    INDEX_VERSION_CHECK_INTERVAL = float(
+        os.getenv("INDEX_VERSION_CHECK_INTERVAL", "30")
+    )
 
 
 class TaskStatus(Enum):
@@ -84,6 +132,7 @@ class GraphState(TypedDict):
 
     question: str
     documents: List[Document]
+    document_scores: List[float]
     web_search_results: Optional[str]
     generation: str
     source: str  # 'vectorstore' or 'web_search'
@@ -91,6 +140,8 @@ class GraphState(TypedDict):
     error_message: Optional[str]
     retry_count: int
     progress: Dict[str, Any]
+    degraded: bool  # answered without the LLM, e.g. while its circuit is open
+    query_embedding: Optional[List[float]]  # set when the answer cache embedded it
 
 
 # Prompt Templates
@@ -102,13 +153,13 @@ class PromptTemplates:
         if language == "zh-TW":
             template = (
                 "您是一位資訊分級助理。評估檢索到的文件是否與使用者問題相關。"
-                '只需回答 \'yes\' 或 \'no\'，格式為 JSON: {"score": "yes"} 或 {"score": "no"}。'
+                '只需回答 \'yes\' 或 \'no\'，格式為 JSON: {{"score": "yes"}} 或 {{"score": "no"}}。'
                 "\n\n問題: {question}\n\n文件: {documents}"
             )
         else:
             template = (
                 "You are a document grader. Assess if retrieved documents are relevant to the user's question. "
-                'Provide a binary score \'yes\' or \'no\' in JSON format: {"score": "yes"} or {"score": "no"}.'
+                'Provide a binary score \'yes\' or \'no\' in JSON format: {{"score": "yes"}} or {{"score": "no"}}.'
                 "\n\nQuestion: {question}\n\nDocuments: {documents}"
             )
 
@@ -167,45 +218,72 @@ class CoreAgent:
     def _initialize_components(self):
         """Initialize all agent components"""
         try:
-            # Initialize embeddings
+            # Initialize embeddings, behind the persistent cache when enabled
             self.embeddings = GoogleGenerativeAIEmbeddings(
                 model=self.config.EMBEDDING_MODEL
             )
+            if self.config.EMBEDDING_CACHE_ENABLED:
+                self.embedding_store = EmbeddingStore(
+                    self.config.EMBEDDING_CACHE_PATH,
+                    max_entries=self.config.EMBEDDING_CACHE_MAX_ENTRIES,
+                )
+                self.embeddings = CachedEmbeddings(
+                    self.embeddings, self.embedding_store, self.config.EMBEDDING_MODEL
+                )
+            else:
+                self.embedding_store = None
 
             # Initialize vector store with fallback
             try:
                 # Try HTTP client first (for Docker)
+                self.chroma_client = chromadb.HttpClient(
+                    host=self.config.CHROMA_HOST, port=self.config.CHROMA_PORT
+                )
+                # Follow the blue/green alias to the live collection version
+                self.collection_name = resolve_collection(
+                    self.chroma_client, self.config.COLLECTION_NAME
+                )
                 self.vectorstore = Chroma(
-                    client=chromadb.HttpClient(
-                        host=self.config.CHROMA_HOST, port=self.config.CHROMA_PORT
-                    ),
-                    collection_name=self.config.COLLECTION_NAME,
+                    client=self.chroma_client,
+                    collection_name=self.collection_name,
                     embedding_function=self.embeddings,
                 )
             except Exception:
                 # Fallback to local directory
                 logger.warning("HTTP client failed, using local directory")
+                self.collection_name = self.config.COLLECTION_NAME
                 self.vectorstore = Chroma(
                     persist_directory=self.config.CHROMA_DB_PATH,
-                    collection_name=self.config.COLLECTION_NAME,
+                    collection_name=self.collection_name,
                     embedding_function=self.embeddings,
                 )
+                self.chroma_client = getattr(self.vectorstore, "_client", None)
 
-            self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 3})
+            self.retriever = self.vectorstore.as_retriever(
+                search_kwargs={"k": self.config.RETRIEVAL_K}
+            )
 
-            # Initialize LLMs
-            self.llm_json = ChatOllama(
-                base_url=self.config.OLLAMA_BASE_URL,
-                model=self.config.OLLAMA_MODEL,
-                format="json",
-                temperature=0,
+            # Embedding and Chroma clients are blocking; keep them off the event loop
+            self.retrieval_executor = ThreadPoolExecutor(
+                max_workers=self.config.RETRIEVAL_WORKERS,
+                thread_name_prefix="retrieval",
             )
 
+            # Initialize LLMs. One client owns a pooled async HTTP connection
+            # to Ollama; the JSON grader shares it through bind().
             self.llm_text = ChatOllama(
                 base_url=self.config.OLLAMA_BASE_URL,
                 model=self.config.OLLAMA_MODEL,
                 temperature=0,
+                client_kwargs={
+                    "timeout": self.config.OLLAMA_TIMEOUT,
+                    "limits": httpx.Limits(
+                        max_connections=self.config.OLLAMA_MAX_CONNECTIONS,
+                        max_keepalive_connections=self.config.OLLAMA_MAX_CONNECTIONS,
+                    ),
+                },
             )
+            self.llm_json = self.llm_text.bind(format="json")
 
             # Initialize web search tool
             if self.config.TAVILY_API_KEY:
@@ -220,28 +298,98 @@ class CoreAgent:
             # Initialize prompt templates
             self.prompts = PromptTemplates()
 
+            # One circuit breaker per external dependency
+            self.breakers = {
+                name: CircuitBreaker(
+                    name,
+                    failure_threshold=self.config.BREAKER_FAILURE_THRESHOLD,
+                    reset_timeout=self.config.BREAKER_RESET_TIMEOUT,
+                )
+                for name in ("chroma", "embeddings", "ollama", "tavily", "drive")
+            }
+
+            # Initialize semantic answer cache
+            if self.config.ANSWER_CACHE_ENABLED:
+                self.answer_cache = SemanticAnswerCache(
+                    max_size=self.config.ANSWER_CACHE_SIZE,
+                    ttl_seconds=self.config.ANSWER_CACHE_TTL,
+                    similarity_threshold=self.config.ANSWER_CACHE_THRESHOLD,
+                )
+            else:
+                self.answer_cache = None
+            self._index_version = None
+            self._index_checked_at = float("-inf")
+
+            self.grading_stats = {
+                "accepted_by_score": 0,
+                "rejected_by_score": 0,
+                "llm_graded": 0,
+            }
+            self._inflight: Dict[str, asyncio.Future] = {}
+            self.coalescing_stats = {"executed": 0, "coalesced": 0}
+            self.speculation_stats = {
+                "launched": 0,
+                "used": 0,
+                "discarded": 0,
+                "failed": 0,
+                "latency_saved_seconds": 0.0,
+            }
+
             logger.info("Agent components initialized successfully")
 
         except Exception as e:
             logger.error(f"Failed to initialize agent components: {e}")
             raise AgentError(f"Initialization failed: {e}", "INIT_ERROR")
 
-    async def _retry_with_backoff(self, func, *args, **kwargs):
-        """Retry mechanism with exponential backoff"""
+    async def _retry_with_backoff(
+        self, func, *args, executor=None, dependency: Optional[str] = None, **kwargs
+    ):
+        """Retry mechanism with jittered exponential backoff
+
+        Synchronous functions run in ``executor`` (the loop's default executor
+        when None) so blocking I/O never stalls the event loop. Calls tagged
+        with a ``dependency`` go through its circuit breaker and fail fast
+        with CIRCUIT_OPEN while it is open.
+        """
         last_error = None
+        loop = asyncio.get_running_loop()
+        breaker = self.breakers.get(dependency) if dependency else None
 
         for attempt in range(self.config.MAX_RETRIES):
+            if breaker and not breaker.allow_request():
+                metrics.CIRCUIT_REJECTIONS.labels(dependency).inc()
+                raise AgentError(
+                    f"Circuit '{dependency}' is open: {last_error or 'failing fast'}",
+                    "CIRCUIT_OPEN",
+                    attempt,
+                )
+
             try:
                 if asyncio.iscoroutinefunction(func):
-                    return await func(*args, **kwargs)
+                    result = await func(*args, **kwargs)
                 else:
-                    return func(*args, **kwargs)
+                    result = await loop.run_in_executor(
+                        executor, functools.partial(func, *args, **kwargs)
+                    )
+                if breaker:
+                    breaker.record_success()
+                return result
+            except asyncio.CancelledError:
+                if breaker:
+                    breaker.release_probe()
+                raise
             except Exception as e:
                 last_error = e
+                if breaker:
+                    breaker.record_failure()
                 if attempt < self.config.MAX_RETRIES - 1:
-                    delay = self.config.RETRY_DELAY * (2**attempt)
+                    metrics.RETRIES.labels(dependency or "other").inc()
+                    # Equal jitter keeps the backoff floor but spreads retries
+                    base = self.config.RETRY_DELAY * (2**attempt)
+                    delay = base / 2 + random.uniform(0, base / 2)
                     logger.warning(
-                        f"Attempt {attempt + 1} failed: {e}. Retrying in {delay}s..."
+                        f"Attempt {attempt + 1} failed: {e}. "
+                        f"Retrying in {delay:.2f}s..."
                     )
                     await asyncio.sleep(delay)
                 else:
@@ -253,6 +401,42 @@ class CoreAgent:
             self.config.MAX_RETRIES,
         )
 
+    def _dependency_open(self, *dependencies: str) -> bool:
+        """True if any of the given dependencies has an open circuit"""
+        return any(self.breakers[name].is_open() for name in dependencies)
+
+    def _fallback_answer(self, source: str, context: Any) -> str:
+        """Answer without the LLM by quoting the retrieved context"""
+        excerpts = []
+        if source == "web_search":
+            for result in (context or [])[:2]:
+                if isinstance(result, dict):
+                    excerpts.append(
+                        f"{result.get('content', '')[:300]} ({result.get('url', '')})"
+                    )
+                else:
+                    excerpts.append(str(result)[:300])
+        else:
+            for doc in (context or [])[:2]:
+                content = getattr(doc, "page_content", str(doc))
+                doc_source = getattr(doc, "metadata", {}).get("source", "")
+                excerpts.append(f"{content[:300]} ({doc_source})")
+
+        if self.config.LANGUAGE == "zh-TW":
+            header = "語言模型服務暫時無法使用，以下是最相關的資料摘錄："
+            empty = "語言模型服務暫時無法使用，請稍後再試。"
+        else:
+            header = (
+                "The language model is temporarily unavailable. Most relevant excerpts:"
+            )
+            empty = (
+                "The language model is temporarily unavailable, please try again later."
+            )
+
+        if not excerpts:
+            return empty
+        return header + "\n\n" + "\n\n".join(f"• {e}" for e in excerpts)
+
     # Graph Nodes
     async def retrieve_documents(self, state: GraphState) -> Dict[str, Any]:
         """Retrieve relevant documents from vector store"""
@@ -260,15 +444,44 @@ class CoreAgent:
 
         try:
             question = state["question"]
+            query_embedding = state.get("query_embedding")
+
+            needed = (
+                ("chroma",) if query_embedding is not None else ("embeddings", "chroma")
+            )
+            if self._dependency_open(*needed):
+                # The query can't be embedded or searched; go to web search
+                logger.warning("Retrieval circuit open, skipping to web search")
+                return {
+                    "documents": [],
+                    "document_scores": [],
+                    "status": TaskStatus.RUNNING,
+                    "progress": {"step": "retrieval_skipped", "count": 0},
+                }
 
-            documents = await self._retry_with_backoff(
-                self.retriever.get_relevant_documents, question
+            # Embedding and search fail independently, so each feeds its own breaker
+            if query_embedding is None:
+                query_embedding = await self._retry_with_backoff(
+                    self.embeddings.embed_query,
+                    question,
+                    executor=self.retrieval_executor,
+                    dependency="embeddings",
+                )
+            results = await self._retry_with_backoff(
+                self._search_by_vector,
+                query_embedding,
+                self.config.RETRIEVAL_K,
+                executor=self.retrieval_executor,
+                dependency="chroma",
             )
+            documents = [doc for doc, _ in results]
+            scores = [score for _, score in results]
 
-            logger.info(f"Retrieved {len(documents)} documents")
+            logger.info(f"Retrieved {len(documents)} documents, scores: {scores}")
 
             return {
                 "documents": documents,
+                "document_scores": scores,
                 "source": "vectorstore",
                 "status": TaskStatus.RUNNING,
                 "progress": {"step": "documents_retrieved", "count": len(documents)},
@@ -278,10 +491,36 @@ class CoreAgent:
             logger.error(f"Document retrieval failed: {e}")
             return {
                 "documents": [],
+                "document_scores": [],
                 "status": TaskStatus.FAILED,
                 "error_message": f"Document retrieval failed: {e}",
             }
 
+    def _search_by_vector(
+        self, embedding: List[float], k: int
+    ) -> List[Tuple[Document, float]]:
+        """Scored search for an embedded query, with relevance in [0, 1]"""
+        # Chroma returns distances here; convert them the way
+        # similarity_search_with_relevance_scores does
+        relevance = self.vectorstore._select_relevance_score_fn()
+        results = self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+            embedding, k=k
+        )
+        return [(doc, relevance(distance)) for doc, distance in results]
+
+    def _grade_by_score(self, state: GraphState) -> Optional[str]:
+        """Grade from retrieval scores alone; None means the LLM grader must decide"""
+        scores = state.get("document_scores")
+        if not scores:
+            return None
+
+        top_score = max(scores)
+        if top_score >= self.config.GRADE_ACCEPT_SCORE:
+            return "relevant"
+        if top_score < self.config.GRADE_REJECT_SCORE:
+            return "not_relevant"
+        return None
+
     async def grade_documents(self, state: GraphState) -> Dict[str, Any]:
         """Grade document relevance to question"""
         logger.info("---NODE: GRADE DOCUMENTS---")
@@ -294,11 +533,56 @@ class CoreAgent:
                 logger.info("No documents to grade, proceeding to web search")
                 return {"documents": [], "status": TaskStatus.RUNNING}
 
+            score_grade = self._grade_by_score(state)
+            if score_grade == "relevant":
+                self.grading_stats["accepted_by_score"] += 1
+                metrics.GRADING.labels("accepted_by_score").inc()
+                logger.info("---DECISION: Top score above accept threshold---")
+                return {
+                    "documents": documents,
+                    "status": TaskStatus.RUNNING,
+                    "progress": {
+                        "step": "documents_graded",
+                        "grade": "relevant",
+                        "method": "score",
+                    },
+                }
+            elif score_grade == "not_relevant":
+                self.grading_stats["rejected_by_score"] += 1
+                metrics.GRADING.labels("rejected_by_score").inc()
+                logger.info("---DECISION: Top score below reject threshold---")
+                return {
+                    "documents": [],
+                    "status": TaskStatus.RUNNING,
+                    "progress": {
+                        "step": "documents_graded",
+                        "grade": "not_relevant",
+                        "method": "score",
+                    },
+                }
+
+            if self._dependency_open("ollama"):
+                # No grader available; keep the documents for an excerpt answer
+                logger.warning("Ollama circuit open, skipping LLM grader")
+                return {
+                    "documents": documents,
+                    "status": TaskStatus.RUNNING,
+                    "progress": {
+                        "step": "documents_graded",
+                        "grade": "relevant",
+                        "method": "fallback",
+                    },
+                }
+
+            self.grading_stats["llm_graded"] += 1
+            metrics.GRADING.labels("llm").inc()
             prompt = self.prompts.get_document_grader_prompt(self.config.LANGUAGE)
             chain = prompt | self.llm_json | JsonOutputParser()
 
             result = await self._retry_with_backoff(
-                chain.invoke, {"question": question, "documents": documents}
+                chain.ainvoke,
+                {"question": question, "documents": documents},
+                dependency="ollama",
             )
 
             grade = result.get("score", "no").lower()
@@ -308,14 +592,22 @@ class CoreAgent:
                 return {
                     "documents": documents,
                     "status": TaskStatus.RUNNING,
-                    "progress": {"step": "documents_graded", "grade": "relevant"},
+                    "progress": {
+                        "step": "documents_graded",
+                        "grade": "relevant",
+                        "method": "llm",
+                    },
                 }
             else:
                 logger.info("---DECISION: Documents not relevant, need web search---")
                 return {
                     "documents": [],
                     "status": TaskStatus.RUNNING,
-                    "progress": {"step": "documents_graded", "grade": "not_relevant"},
+                    "progress": {
+                        "step": "documents_graded",
+                        "grade": "not_relevant",
+                        "method": "llm",
+                    },
                 }
 
         except Exception as e:
@@ -338,7 +630,7 @@ class CoreAgent:
             question = state["question"]
 
             search_results = await self._retry_with_backoff(
-                self.web_search_tool.invoke, {"query": question}
+                self.web_search_tool.invoke, {"query": question}, dependency="tavily"
             )
 
             logger.info(f"Web search completed with {len(search_results)} results")
@@ -361,8 +653,27 @@ class CoreAgent:
                 "error_message": f"Web search failed: {e}",
             }
 
-    async def generate_answer(self, state: GraphState) -> Dict[str, Any]:
-        """Generate answer from documents or web search results"""
+    async def _stream_generation(
+        self,
+        chain,
+        inputs: Dict[str, Any],
+        on_token: Callable[[str], Awaitable[None]],
+    ) -> str:
+        """Stream a generation, passing the accumulated text to on_token"""
+        generation = ""
+        async for chunk in chain.astream(inputs):
+            generation += chunk
+            await on_token(generation)
+        return generation
+
+    async def generate_answer(
+        self, state: GraphState, config: Optional[RunnableConfig] = None
+    ) -> Dict[str, Any]:
+        """Generate answer from documents or web search results
+
+        When the run config carries an ``on_token`` callback the answer is
+        streamed and the callback receives the text generated so far.
+        """
         logger.info("---NODE: GENERATE ANSWER---")
 
         try:
@@ -376,11 +687,31 @@ class CoreAgent:
                 context = state.get("documents", [])
                 prompt = self.prompts.get_generation_prompt(self.config.LANGUAGE)
 
-            chain = prompt | self.llm_text | StrOutputParser()
+            if self._dependency_open("ollama"):
+                logger.warning("Ollama circuit open, answering with excerpts")
+                return {
+                    "generation": self._fallback_answer(source, context),
+                    "degraded": True,
+                    "status": TaskStatus.RUNNING,
+                    "progress": {"step": "answer_fallback", "source": source},
+                }
 
-            generation = await self._retry_with_backoff(
-                chain.invoke, {"context": context, "question": question}
-            )
+            chain = prompt | self.llm_text | StrOutputParser()
+            inputs = {"context": context, "question": question}
+            on_token = (config or {}).get("configurable", {}).get("on_token")
+
+            if on_token is not None:
+                generation = await self._retry_with_backoff(
+                    self._stream_generation,
+                    chain,
+                    inputs,
+                    on_token,
+                    dependency="ollama",
+                )
+            else:
+                generation = await self._retry_with_backoff(
+                    chain.ainvoke, inputs, dependency="ollama"
+                )
 
             logger.info("Answer generation completed")
 
@@ -442,21 +773,84 @@ class CoreAgent:
             filename = f"SOP_{question[:30].replace(' ', '_')}_{timestamp}.txt"
             content = f"Question: {question}\n\nAnswer:\n{answer}\n\nSource: Web Search"
 
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, upload_qa_to_drive, question, answer)
+            if self._dependency_open("drive"):
+                logger.warning("Drive circuit open, skipping knowledge save")
+                return
+
+            # Runs in the default thread pool to avoid blocking
+            await self._retry_with_backoff(
+                upload_qa_to_drive, question, answer, dependency="drive"
+            )
 
             logger.info(f"Successfully saved knowledge to Google Drive: {filename}")
 
         except Exception as e:
             logger.error(f"Background save to Google Drive failed: {e}")
 
+    async def grade_with_speculative_search(self, state: GraphState) -> Dict[str, Any]:
+        """Grade documents while a web search runs speculatively in parallel"""
+        if self._grade_by_score(state) is not None or self._dependency_open("tavily"):
+            # Scores settle the grade instantly, or search would fail fast anyway
+            return await self.grade_documents(state)
+
+        timings = {}
+
+        async def timed(name, coro):
+            started = time.monotonic()
+            try:
+                return await coro
+            finally:
+                timings[name] = time.monotonic() - started
+
+        started = time.monotonic()
+        search_task = asyncio.create_task(timed("search", self.web_search(state)))
+        self.speculation_stats["launched"] += 1
+
+        grade_result = await timed("grade", self.grade_documents(state))
+
+        if grade_result.get("documents"):
+            search_task.cancel()
+            self.speculation_stats["discarded"] += 1
+            metrics.SPECULATIVE_SEARCHES.labels("discarded").inc()
+            logger.info("---SPECULATION: Documents relevant, web search discarded---")
+            return grade_result
+
+        search_result = await search_task
+        if search_result.get("status") == TaskStatus.FAILED:
+            # The search already failed (with retries); decide_to_generate
+            # skips the web_search node rather than calling Tavily again
+            self.speculation_stats["failed"] += 1
+            metrics.SPECULATIVE_SEARCHES.labels("failed").inc()
+            return {
+                **grade_result,
+                **search_result,
+                "progress": {"step": "speculative_search_failed"},
+            }
+
+        # Sequential execution would have paid grading and search back to back
+        saved = max(
+            timings["grade"] + timings["search"] - (time.monotonic() - started), 0.0
+        )
+        self.speculation_stats["used"] += 1
+        self.speculation_stats["latency_saved_seconds"] += saved
+        metrics.SPECULATIVE_SEARCHES.labels("used").inc()
+        metrics.SPECULATION_SAVED.inc(saved)
+        logger.info(f"---SPECULATION: Web search used, saved {saved:.2f}s---")
+
+        return {**grade_result, **search_result}
+
     # Graph Edges
     def decide_to_generate(self, state: GraphState) -> str:
         """Decide whether to generate from documents or search web"""
         documents = state.get("documents", [])
         if documents:
             return "generate_from_docs"
+        elif state.get("source") == "web_search":
+            # A speculative search already produced results
+            return "generate_from_web"
+        elif (state.get("progress") or {}).get("step") == "speculative_search_failed":
+            # Same outcome as a failed web_search node, without searching twice
+            return "generate_from_web"
         else:
             return "web_search"
 
@@ -466,7 +860,10 @@ class CoreAgent:
 
         # Add nodes
         workflow.add_node("retrieve", self.retrieve_documents)
-        workflow.add_node("grade_documents", self.grade_documents)
+        if self.config.SPECULATIVE_WEB_SEARCH and self.web_search_tool:
+            workflow.add_node("grade_documents", self.grade_with_speculative_search)
+        else:
+            workflow.add_node("grade_documents", self.grade_documents)
         workflow.add_node("web_search", self.web_search)
         workflow.add_node("generate_from_docs", self.generate_answer)
         workflow.add_node("generate_from_web", self.generate_answer)
@@ -482,6 +879,7 @@ class CoreAgent:
             self.decide_to_generate,
             {
                 "generate_from_docs": "generate_from_docs",
+                "generate_from_web": "generate_from_web",
                 "web_search": "web_search",
             },
         )
@@ -494,13 +892,186 @@ class CoreAgent:
         self.graph = workflow.compile()
         logger.info("Agent graph compiled successfully")
 
-    async def process_question(self, question: str) -> Dict[str, Any]:
-        """Main entry point for processing questions"""
+    # Semantic Answer Cache
+    def _read_index_version(self) -> Tuple[str, str]:
+        """(live collection name, fingerprint); the fingerprint changes on re-ingest"""
+        name = resolve_collection(self.chroma_client, self.config.COLLECTION_NAME)
+        collection = self.chroma_client.get_collection(name)
+        metadata = collection.metadata or {}
+        return name, f"{collection.id}:{metadata.get('ingested_at', '')}"
+
+    def _switch_collection(self, name: str):
+        """Point retrieval at another collection version without a restart"""
+        self.vectorstore = Chroma(
+            client=self.chroma_client,
+            collection_name=name,
+            embedding_function=self.embeddings,
+        )
+        self.retriever = self.vectorstore.as_retriever(
+            search_kwargs={"k": self.config.RETRIEVAL_K}
+        )
+        self.collection_name = name
+
+    async def _refresh_index(self):
+        """Follow alias switches and invalidate cached answers after a re-ingest"""
+        now = time.monotonic()
+        if now - self._index_checked_at < self.config.INDEX_VERSION_CHECK_INTERVAL:
+            return
+        self._index_checked_at = now
+
+        try:
+            loop = asyncio.get_running_loop()
+            name, version = await loop.run_in_executor(
+                self.retrieval_executor, self._read_index_version
+            )
+            if name != self.collection_name:
+                logger.info(f"Alias switched, now querying collection '{name}'")
+                self._switch_collection(name)
+        except Exception as e:
+            logger.warning(f"Index version check failed: {e}")
+            return
+
+        if self._index_version is not None and version != self._index_version:
+            if self.answer_cache is not None:
+                logger.info("Collection was re-ingested, invalidating answer cache")
+                self.answer_cache.invalidate()
+        self._index_version = version
+
+    async def _lookup_cached_answer(
+        self, question: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """Return (cached state, question embedding); both None when unavailable"""
+        if self.answer_cache is None:
+            return None, None
+
+        if self._dependency_open("embeddings"):
+            return None, None
+
+        try:
+            embedding = await self._retry_with_backoff(
+                self.embeddings.aembed_query, question, dependency="embeddings"
+            )
+            match = self.answer_cache.lookup(embedding)
+        except Exception as e:
+            logger.warning(f"Answer cache lookup failed: {e}")
+            return None, None
+
+        if match is None:
+            metrics.ANSWER_CACHE_LOOKUPS.labels("miss").inc()
+            return None, embedding
+
+        metrics.ANSWER_CACHE_LOOKUPS.labels("hit").inc()
+
+        cached, similarity = match
+        logger.info(f"Answer cache hit (similarity {similarity:.3f})")
+        return (
+            {
+                **cached,
+                "question": question,
+                "status": TaskStatus.COMPLETED,
+                "error_message": None,
+                "retry_count": 0,
+                "progress": {"step": "cache_hit", "similarity": similarity},
+            },
+            embedding,
+        )
+
+    def _store_cached_answer(
+        self, question: str, embedding: List[float], state: Dict[str, Any]
+    ):
+        """Cache a cleanly completed answer for future similar questions
+
+        Fallback answers quoting excerpts are not cached; they would keep
+        being served after the LLM recovers.
+        """
+        if (
+            state.get("status") != TaskStatus.COMPLETED
+            or state.get("error_message")
+            or state.get("degraded")
+            or not state.get("generation")
+        ):
+            return
+
+        try:
+            self.answer_cache.store(
+                question,
+                embedding,
+                {
+                    "documents": state.get("documents", []),
+                    "web_search_results": state.get("web_search_results"),
+                    "generation": state["generation"],
+                    "source": state.get("source", ""),
+                },
+            )
+        except Exception as e:
+            logger.warning(f"Answer cache store failed: {e}")
+
+    @staticmethod
+    def _observe_question(started: float, source: str):
+        """Record end-to-end latency and the answer source split"""
+        metrics.QUESTION_LATENCY.labels(source).observe(time.monotonic() - started)
+        metrics.ANSWERS.labels(source).inc()
+
+    # Request Coalescing
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        """Key under which identical questions share one graph run"""
+        normalized = unicodedata.normalize("NFKC", question).casefold()
+        normalized = re.sub(r"<@[^>]+>", "", normalized)
+        normalized = re.sub(r"[\s?!.。？！]+$", "", normalized.strip())
+        return " ".join(normalized.split())
+
+    async def process_question(
+        self,
+        question: str,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """Main entry point for processing questions
+
+        ``on_token`` is awaited with the partial answer while it streams.
+        Concurrent identical questions await the first one's graph run; only
+        that first requester receives streamed tokens.
+        """
+        if not self.config.COALESCE_QUESTIONS:
+            return await self._run_question(question, on_token)
+
+        key = self._normalize_question(question)
+        inflight = self._inflight.get(key)
+
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._run_question(question, on_token))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.coalescing_stats["executed"] += 1
+        else:
+            self.coalescing_stats["coalesced"] += 1
+            metrics.COALESCED.inc()
+            logger.info(f"Coalescing with in-flight run for: {question}")
+
+        # Shield the shared run so one requester's cancellation can't abort it
+        result = await asyncio.shield(inflight)
+        return {**result, "question": question}
+
+    async def _run_question(
+        self,
+        question: str,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """Answer a question from the cache or by running the graph"""
         logger.info(f"Processing question: {question}")
+        started = time.monotonic()
+        if self.chroma_client is not None:
+            await self._refresh_index()
+
+        cached, embedding = await self._lookup_cached_answer(question)
+        if cached is not None:
+            self._observe_question(started, "cache")
+            return cached
 
         initial_state = {
             "question": question,
             "documents": [],
+            "document_scores": [],
             "web_search_results": None,
             "generation": "",
             "source": "",
@@ -508,19 +1079,39 @@ class CoreAgent:
             "error_message": None,
             "retry_count": 0,
             "progress": {"step": "initialized"},
+            "degraded": False,
+            # The answer cache lookup's embedding, so retrieval doesn't redo it
+            "query_embedding": embedding,
         }
 
         try:
-            final_state = None
-            async for output in self.graph.astream(initial_state):
-                for key, value in output.items():
-                    logger.info(f"Node '{key}' completed")
-                    final_state = value
+            final_state = initial_state
+            # Nodes run one after another, so the gap between consecutive
+            # updates is the time spent in the node that just finished
+            node_started = time.monotonic()
+            async for mode, output in self.graph.astream(
+                initial_state,
+                config={"configurable": {"on_token": on_token}},
+                stream_mode=["updates", "values"],
+            ):
+                if mode == "updates":
+                    now = time.monotonic()
+                    for key in output:
+                        logger.info(f"Node '{key}' completed")
+                        metrics.NODE_LATENCY.labels(key).observe(now - node_started)
+                    node_started = now
+                else:
+                    final_state = output
+
+            if embedding is not None:
+                self._store_cached_answer(question, embedding, final_state)
 
+            self._observe_question(started, final_state.get("source") or "none")
             return final_state
 
         except Exception as e:
             logger.error(f"Graph execution failed: {e}")
+            self._observe_question(started, "error")
             return {
                 **initial_state,
                 "status": TaskStatus.FAILED,
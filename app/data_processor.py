@@ -1,19 +1,68 @@
 import os
-from typing import List
+import time
+import logging
+import mimetypes
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
 from langchain_core.documents import Document
+from langchain_core.document_loaders import BaseLoader
 from langchain_community.document_loaders import (
+    BSHTMLLoader,
+    CSVLoader,
     TextLoader,
-    PyPDFLoader,
     Docx2txtLoader,
 )
+from .pdf_loader import TextFirstPDFLoader
+from .office_loaders import PptxLoader, XlsxLoader
+
+try:
+    import magic
+except ImportError:  # python-magic or libmagic missing: detect by extension only
+    magic = None
+
+logger = logging.getLogger(__name__)
+
+LoaderFactory = Callable[[str], BaseLoader]
+
+# MIME type -> (format name, loader factory), and extension -> MIME type
+_LOADERS: Dict[str, Tuple[str, LoaderFactory]] = {}
+_EXTENSIONS: Dict[str, str] = {}
+
+# What libmagic reports for content it can't tell apart: any text, zip
+# containers (Office files on older libmagic) and empty files. The
+# extension decides for these.
+_GENERIC_TYPES = {
+    "application/octet-stream",
+    "application/zip",
+    "application/x-empty",
+    "inode/x-empty",
+}
+
+
+@dataclass
+class LoadError:
+    """A file that could not be loaded"""
+
+    source: str
+    error_type: str
+    message: str
+
+    @classmethod
+    def from_exception(cls, source: str, error: BaseException) -> "LoadError":
+        return cls(source=source, error_type=type(error).__name__, message=str(error))
 
 
 def load_documents_from_path(path: str) -> List[Document]:
     """
     Loads documents from a given file or directory path.
 
-    Supports .txt, .pdf, and .docx files.
+    Supports every format in the loader registry (text, Markdown, CSV, HTML,
+    PDF, .docx, .pptx and .xlsx).
     If a directory is provided, it will recursively search for supported files.
+    Everything is returned at once; use iter_documents to stream large
+    directories.
 
     Args:
         path: The absolute or relative path to the file or directory.
@@ -29,38 +78,206 @@ def load_documents_from_path(path: str) -> List[Document]:
 
     documents = []
     if os.path.isdir(path):
-        for root, _, files in os.walk(path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    documents.extend(load_single_document(file_path))
-                except NotImplementedError:
-                    # Silently ignore unsupported file types in directory scan
-                    continue
+        for file_path in iter_files(path):
+            try:
+                documents.extend(load_single_document(file_path))
+            except NotImplementedError:
+                # Silently ignore unsupported file types in directory scan
+                continue
     elif os.path.isfile(path):
         documents = load_single_document(path)
 
     return documents
 
 
-def load_single_document(file_path: str) -> List[Document]:
+def register_loader(
+    name: str, mime_type: str, extensions: Tuple[str, ...], factory: LoaderFactory
+):
+    """Use `factory` for files detected as `mime_type`, or named with `extensions`"""
+    _LOADERS[mime_type] = (name, factory)
+    for extension in extensions:
+        _EXTENSIONS[extension.lower()] = mime_type
+
+
+def registered_loaders() -> Dict[str, str]:
+    """Format name -> loader for every registered MIME type"""
+    return {
+        name: getattr(factory, "__name__", repr(factory))
+        for name, factory in _LOADERS.values()
+    }
+
+
+def _sniff(file_path: str) -> Optional[str]:
+    if magic is None:
+        return None
+    try:
+        return magic.from_file(file_path, mime=True)
+    except Exception as e:
+        logger.debug(f"Could not sniff {file_path}: {e}")
+        return None
+
+
+def detect_mime_type(file_path: str) -> Optional[str]:
     """
-    Loads a single document from a file path based on its extension.
-    Handles empty or invalid files for testing purposes by returning a document
-    with empty content but correct metadata.
+    MIME type of a file from its content, falling back to its extension.
+
+    libmagic catches misnamed files (a PDF saved as .doc), but reports all
+    text as text/* and older versions report Office files as zip, so for
+    generic results the extension is more specific. Generic content with an
+    unknown extension is unsupported rather than read as plain text.
     """
+    sniffed = _sniff(file_path)
+    if sniffed and not sniffed.startswith("text/") and sniffed not in _GENERIC_TYPES:
+        return sniffed
     _, extension = os.path.splitext(file_path)
     extension = extension.lower()
+    return _EXTENSIONS.get(extension) or mimetypes.guess_type(file_path)[0]
 
-    loader = None
-    if extension == ".txt":
-        loader = TextLoader(file_path, encoding="utf-8")
-    elif extension == ".pdf":
-        loader = PyPDFLoader(file_path)
-    elif extension == ".docx":
-        loader = Docx2txtLoader(file_path)
-    else:
-        raise NotImplementedError(f"File type '{extension}' is not supported.")
+
+def format_name(mime_type: Optional[str]) -> str:
+    """Short name of a registered format ("pdf", "csv", ...), else the MIME type"""
+    if mime_type in _LOADERS:
+        return _LOADERS[mime_type][0]
+    return mime_type or "unknown"
+
+
+def get_loader(
+    file_path: str,
+    fallback: Optional[LoaderFactory] = None,
+    mime_type: Optional[str] = None,
+) -> BaseLoader:
+    """
+    The cheapest loader for a file's detected format.
+
+    Formats without a registered loader use `fallback` if given.
+
+    Raises:
+        NotImplementedError: If the format is unsupported and there is no fallback.
+    """
+    mime_type = mime_type or detect_mime_type(file_path)
+    if mime_type in _LOADERS:
+        return _LOADERS[mime_type][1](file_path)
+    if fallback is not None:
+        return fallback(file_path)
+    _, extension = os.path.splitext(file_path)
+    raise NotImplementedError(
+        f"File type '{extension.lower() or mime_type}' is not supported."
+    )
+
+
+def _text_loader(file_path: str) -> BaseLoader:
+    # Falls back to charset detection for Big5 and other legacy encodings
+    return TextLoader(file_path, encoding="utf-8", autodetect_encoding=True)
+
+
+class _JoinedCSVLoader(BaseLoader):
+    """Loads a CSV as one Document of "column: value" rows separated by blank lines
+
+    CSVLoader yields a Document per row, which would give every row its own
+    chunk and embedding; joined, the text splitter packs many rows into
+    each chunk and still splits between rows.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def lazy_load(self) -> Iterator[Document]:
+        # utf-8-sig drops the BOM Excel writes
+        rows = CSVLoader(
+            self.file_path, encoding="utf-8-sig", autodetect_encoding=True
+        ).lazy_load()
+        texts = [row.page_content for row in rows]
+        if texts:
+            yield Document(
+                page_content="\n\n".join(texts),
+                metadata={"source": self.file_path, "rows": len(texts)},
+            )
+
+
+def _csv_loader(file_path: str) -> BaseLoader:
+    return _JoinedCSVLoader(file_path)
+
+
+def _html_loader(file_path: str) -> BaseLoader:
+    return BSHTMLLoader(file_path, open_encoding="utf-8", get_text_separator="\n")
+
+
+register_loader("text", "text/plain", (".txt",), _text_loader)
+# Markdown is readable as is; parsing it would only drop the markup
+register_loader("markdown", "text/markdown", (".md", ".markdown"), _text_loader)
+register_loader("csv", "text/csv", (".csv",), _csv_loader)
+register_loader("html", "text/html", (".html", ".htm"), _html_loader)
+register_loader("pdf", "application/pdf", (".pdf",), TextFirstPDFLoader)
+register_loader(
+    "docx",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    (".docx",),
+    Docx2txtLoader,
+)
+register_loader(
+    "pptx",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    (".pptx",),
+    PptxLoader,
+)
+register_loader(
+    "xlsx",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    (".xlsx",),
+    XlsxLoader,
+)
+
+
+class FormatStats:
+    """Parse volume and time per format, to see which formats dominate ingestion"""
+
+    def __init__(self):
+        self.formats: Dict[str, Dict[str, Any]] = {}
+
+    def record(
+        self,
+        name: str,
+        size: int,
+        seconds: float,
+        documents: int = 0,
+        failed: bool = False,
+    ):
+        totals = self.formats.setdefault(
+            name,
+            {"files": 0, "failed": 0, "bytes": 0, "documents": 0, "seconds": 0.0},
+        )
+        totals["files"] += 1
+        totals["failed"] += int(failed)
+        totals["bytes"] += size
+        totals["documents"] += documents
+        totals["seconds"] += seconds
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per-format totals with throughput and share of parse time, slowest first"""
+        total_seconds = sum(totals["seconds"] for totals in self.formats.values())
+        rows = []
+        for name, totals in self.formats.items():
+            seconds = totals["seconds"]
+            rows.append(
+                {
+                    "format": name,
+                    **totals,
+                    "mb_per_second": (
+                        totals["bytes"] / 1e6 / seconds if seconds else 0.0
+                    ),
+                    "share": seconds / total_seconds if total_seconds else 0.0,
+                }
+            )
+        return sorted(rows, key=lambda row: row["seconds"], reverse=True)
+
+
+def load_single_document(file_path: str) -> List[Document]:
+    """
+    Loads a single document from a file path based on its detected format.
+    Handles empty or invalid files for testing purposes by returning a document
+    with empty content but correct metadata.
+    """
+    loader = get_loader(file_path)
 
     try:
         docs = loader.load()
@@ -73,3 +290,134 @@ def load_single_document(file_path: str) -> List[Document]:
         # If a loader fails (e.g., PyPDF on an empty file), return a placeholder
         # to satisfy tests that count the number of processed files.
         return [Document(page_content="", metadata={"source": file_path})]
+
+
+def iter_files(path: str) -> Iterator[str]:
+    """Every file under a directory, in sorted walk order"""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+
+def _load_file(file_path: str, mime_type: str) -> Tuple[List[Document], float]:
+    # Top-level so process pools can pickle it
+    started = time.perf_counter()
+    documents = list(get_loader(file_path, mime_type=mime_type).lazy_load())
+    return documents, time.perf_counter() - started
+
+
+def _file_size(file_path: str) -> int:
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+
+def _log_error(error: LoadError):
+    logger.warning(
+        f"Could not load {error.source}: {error.error_type}: {error.message}"
+    )
+
+
+def iter_documents(
+    path: str,
+    workers: int = 0,
+    use_processes: bool = False,
+    prefetch: Optional[int] = None,
+    on_error: Optional[Callable[[LoadError], None]] = None,
+    stats: Optional[FormatStats] = None,
+) -> Iterator[Document]:
+    """
+    Yields documents from a file or directory one file at a time.
+
+    With workers=0, files are read lazily in the caller's thread, PDFs page
+    by page, so memory stays at one page however large the directory. With
+    workers > 0, up to `prefetch` files (default 2 per worker) are loaded
+    ahead on a thread pool, or a process pool with use_processes for
+    CPU-bound parsing, and yielded in walk order; memory is then bounded by
+    those files.
+
+    A file that fails to load is passed to on_error as a LoadError (logged
+    by default) and skipped, rather than yielding a placeholder. Unsupported
+    files in a directory are skipped. Parse time per format is added to
+    `stats` if given.
+
+    Raises:
+        FileNotFoundError: If the path does not exist.
+        NotImplementedError: If path is a single file of an unsupported type.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"The path '{path}' does not exist.")
+    if os.path.isfile(path):
+        get_loader(path)
+        files: Iterator[str] = iter([path])
+    else:
+        files = iter_files(path)
+    report = on_error or _log_error
+
+    def supported() -> Iterator[Tuple[str, str]]:
+        for file_path in files:
+            mime_type = detect_mime_type(file_path)
+            if mime_type in _LOADERS:
+                yield file_path, mime_type
+
+    def record(file_path, mime_type, seconds, documents, failed=False):
+        if stats is not None:
+            stats.record(
+                format_name(mime_type),
+                _file_size(file_path),
+                seconds,
+                documents,
+                failed,
+            )
+
+    if workers <= 0:
+        for file_path, mime_type in supported():
+            # Only time spent inside the loader counts, not the caller's
+            seconds, count, failed = 0.0, 0, False
+            try:
+                documents = get_loader(file_path, mime_type=mime_type).lazy_load()
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        document = next(documents)
+                    finally:
+                        seconds += time.perf_counter() - started
+                    count += 1
+                    yield document
+            except StopIteration:
+                pass
+            except Exception as e:
+                failed = True
+                report(LoadError.from_exception(file_path, e))
+            record(file_path, mime_type, seconds, count, failed)
+        return
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    window = max(prefetch or 2 * workers, 1)
+    pool = executor_class(max_workers=workers)
+    pending: Deque[Tuple[str, str, Future]] = deque()
+
+    def next_file() -> List[Document]:
+        file_path, mime_type, future = pending.popleft()
+        try:
+            documents, seconds = future.result()
+        except Exception as e:
+            report(LoadError.from_exception(file_path, e))
+            record(file_path, mime_type, 0.0, 0, failed=True)
+            return []
+        record(file_path, mime_type, seconds, len(documents))
+        return documents
+
+    try:
+        for file_path, mime_type in supported():
+            future = pool.submit(_load_file, file_path, mime_type)
+            pending.append((file_path, mime_type, future))
+            if len(pending) >= window:
+                yield from next_file()
+        while pending:
+            yield from next_file()
+    finally:
+        # Don't start files nobody will read if the caller stops early
+        pool.shutdown(wait=True, cancel_futures=True)
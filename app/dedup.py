@@ -0,0 +1,105 @@
+"""
+Near-duplicate detection for chunks.
+The SOP share holds many revisions and copies of the same documents, so
+chunks are fingerprinted with a 64-bit SimHash and chunks whose
+fingerprints differ in only a few bits are treated as the same text.
+"""
+
+import re
+import hashlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+# CJK ideographs, kana and hangul count as words of their own, so Chinese
+# text is shingled by characters and English by words
+_TOKEN = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]|[^\W_]+"
+)
+SHINGLE_SIZE = 3
+# Unrelated chunks differ in ~32 of 64 bits; a few edited characters in a
+# 1000-character chunk move its fingerprint by 3-8 bits
+MAX_DISTANCE = 6
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    """Overlapping token n-grams of lowercased text"""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) <= size:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)]
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of a text's shingles"""
+    weights = [0] * 64
+    for shingle in shingles(text):
+        value = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class SimHashIndex:
+    """Finds stored fingerprints within max_distance bits of a query
+
+    Fingerprints are split into max_distance + 1 blocks; two fingerprints
+    that differ in at most max_distance bits agree on at least one block,
+    so only keys sharing a block are compared.
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        blocks = max_distance + 1
+        width = 64 // blocks
+        # (shift, mask) per block; the last block takes the leftover bits
+        self._blocks = [
+            (i * width, (1 << (64 - i * width if i == blocks - 1 else width)) - 1)
+            for i in range(blocks)
+        ]
+        self.fingerprints: Dict[str, int] = {}
+        self._tables: List[Dict[int, Set[str]]] = [
+            defaultdict(set) for _ in range(blocks)
+        ]
+
+    def _keys(self, fingerprint: int) -> Iterable[int]:
+        return (fingerprint >> shift & mask for shift, mask in self._blocks)
+
+    def add(self, key: str, fingerprint: int):
+        if key in self.fingerprints:
+            return
+        self.fingerprints[key] = fingerprint
+        for table, block in zip(self._tables, self._keys(fingerprint)):
+            table[block].add(key)
+
+    def remove(self, key: str):
+        fingerprint = self.fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for table, block in zip(self._tables, self._keys(fingerprint)):
+            table[block].discard(key)
+            if not table[block]:
+                del table[block]
+
+    def find(self, fingerprint: int, exclude: Iterable[str] = ()) -> Optional[str]:
+        """Closest stored key within max_distance, or None"""
+        exclude = set(exclude)
+        best = None
+        for table, block in zip(self._tables, self._keys(fingerprint)):
+            for key in table.get(block, ()):
+                if key in exclude:
+                    continue
+                distance = hamming(fingerprint, self.fingerprints[key])
+                if distance <= self.max_distance and (
+                    best is None or (distance, key) < best
+                ):
+                    best = (distance, key)
+        return best[1] if best else None
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
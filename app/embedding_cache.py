@@ -0,0 +1,233 @@
+"""
+Persistent embedding cache shared by the agent and the ingest script.
+Vectors are stored in SQLite keyed by (model, task, text hash), so repeated
+questions and re-ingested chunks are embedded once no matter which process
+asks for them.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH = 500
+
+
+class EmbeddingStore:
+    """SQLite-backed text-hash -> vector store with least-recently-used eviction
+
+    WAL mode and a busy timeout let the uvicorn workers and the ingest
+    script share one file. The connection is opened on first use.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and self.path != ":memory:":
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS embeddings_last_used "
+                    "ON embeddings(last_used)"
+                )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _key(namespace: str, text: str) -> bytes:
+        return hashlib.sha256(f"{namespace}\0{text}".encode("utf-8")).digest()
+
+    def get_many(self, namespace: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Cached vectors in input order, None where a text is not cached"""
+        keys = [self._key(namespace, text) for text in texts]
+        found: Dict[bytes, bytes] = {}
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(keys), _SQL_BATCH):
+                batch = keys[i : i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                found.update(
+                    conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                        batch,
+                    )
+                )
+            if found:
+                now = time.time()
+                with conn:
+                    conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found],
+                    )
+
+        hits = sum(1 for key in keys if key in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return [
+            (
+                np.frombuffer(found[key], dtype=np.float32).tolist()
+                if key in found
+                else None
+            )
+            for key in keys
+        ]
+
+    def put_many(self, namespace: str, texts: List[str], vectors: List[List[float]]):
+        now = time.time()
+        rows = [
+            (
+                self._key(namespace, text),
+                np.asarray(vector, dtype=np.float32).tobytes(),
+                now,
+            )
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) "
+                    "VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._evict(conn)
+        self.writes += len(rows)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Trim to 90% of max_entries once the cap is exceeded"""
+        if self.max_entries <= 0:
+            return
+        count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - self.max_entries + self.max_entries // 10
+        conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self.evictions += excess
+        logger.info(f"Evicted {excess} least recently used embeddings")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return (
+                self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that consults an EmbeddingStore before the provider
+
+    Query and document vectors are cached separately because providers
+    embed them with different task types. A failing store is logged and
+    treated as a miss, never as an embedding failure.
+    """
+
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore, model: str):
+        self.embeddings = embeddings
+        self.store = store
+        self.model = model
+
+    def _lookup(self, namespace: str, texts: List[str]) -> List[Optional[List[float]]]:
+        try:
+            vectors = self.store.get_many(namespace, texts)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            return [None] * len(texts)
+        hits = sum(1 for vector in vectors if vector is not None)
+        metrics.EMBEDDING_CACHE_LOOKUPS.labels("hit").inc(hits)
+        metrics.EMBEDDING_CACHE_LOOKUPS.labels("miss").inc(len(texts) - hits)
+        return vectors
+
+    def _store(self, namespace: str, texts: List[str], vectors: List[List[float]]):
+        try:
+            self.store.put_many(namespace, texts, vectors)
+        except Exception as e:
+            logger.warning(f"Embedding cache store failed: {e}")
+
+    @staticmethod
+    def _missing(texts: List[str], cached: List[Optional[List[float]]]) -> List[str]:
+        return list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+
+    @staticmethod
+    def _merge(texts, cached, missing, vectors) -> List[List[float]]:
+        fresh = dict(zip(missing, vectors))
+        return [v if v is not None else fresh[t] for t, v in zip(texts, cached)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        namespace = f"{self.model}:document"
+        cached = self._lookup(namespace, texts)
+        missing = self._missing(texts, cached)
+        vectors = self.embeddings.embed_documents(missing) if missing else []
+        if missing:
+            self._store(namespace, missing, vectors)
+        return self._merge(texts, cached, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        namespace = f"{self.model}:query"
+        [cached] = self._lookup(namespace, [text])
+        if cached is not None:
+            return cached
+        vector = self.embeddings.embed_query(text)
+        self._store(namespace, [text], [vector])
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        namespace = f"{self.model}:document"
+        cached = await asyncio.to_thread(self._lookup, namespace, texts)
+        missing = self._missing(texts, cached)
+        vectors = await self.embeddings.aembed_documents(missing) if missing else []
+        if missing:
+            await asyncio.to_thread(self._store, namespace, missing, vectors)
+        return self._merge(texts, cached, missing, vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        namespace = f"{self.model}:query"
+        [cached] = await asyncio.to_thread(self._lookup, namespace, [text])
+        if cached is not None:
+            return cached
+        vector = await self.embeddings.aembed_query(text)
+        await asyncio.to_thread(self._store, namespace, [text], [vector])
+        return vector
@@ -0,0 +1,131 @@
+"""
+File change detection for continuous ingestion.
+Changes come from inotify (through watchdog) where the filesystem delivers
+events, or from polling (mtime, size) snapshots where it doesn't, e.g. bind
+mounts from a Windows host. Either way they go through a ChangeBatcher,
+which debounces them per file and releases them in batches.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeBatcher:
+    """Debounces file change events and releases them in batches
+
+    A path is ready once it has been quiet for `debounce` seconds, so a
+    file being copied is ingested once, after the copy; a path that keeps
+    changing is released anyway `max_wait` seconds after its first event.
+    Events arrive on the observer's thread, so all access is locked.
+    """
+
+    def __init__(
+        self,
+        debounce: float = 5.0,
+        max_wait: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self._clock = clock
+        self._pending: Dict[str, List[float]] = {}  # path -> [first, last event]
+        self._lock = threading.Lock()
+
+    def add(self, path: str, first_seen: Optional[float] = None):
+        """Record a change; first_seen re-queues a path with its original time"""
+        now = self._clock()
+        with self._lock:
+            entry = self._pending.get(path)
+            if entry is None:
+                self._pending[path] = [first_seen or now, now]
+            else:
+                entry[0] = min(entry[0], first_seen or entry[0])
+                entry[1] = now
+
+    def take(self, limit: int) -> Dict[str, float]:
+        """Up to `limit` ready paths, oldest first, with when each was first seen"""
+        now = self._clock()
+        with self._lock:
+            ready = sorted(
+                (first, path)
+                for path, (first, last) in self._pending.items()
+                if now - last >= self.debounce or now - first >= self.max_wait
+            )[:limit]
+            for _, path in ready:
+                del self._pending[path]
+        return {path: first for first, path in ready}
+
+    def backlog(self) -> Tuple[int, float]:
+        """(pending paths, seconds since the oldest pending change)"""
+        now = self._clock()
+        with self._lock:
+            oldest = min((first for first, _ in self._pending.values()), default=now)
+            return len(self._pending), now - oldest
+
+
+class PollingScanner:
+    """Finds changed files by comparing (mtime, size) snapshots of a tree"""
+
+    def __init__(self, list_files: Callable[[], Iterable[str]]):
+        self._list_files = list_files
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in self._list_files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def changes(self) -> List[str]:
+        """Paths created, modified or deleted since the previous scan"""
+        current = self._scan()
+        changed = [
+            path
+            for path in current.keys() | self.snapshot.keys()
+            if current.get(path) != self.snapshot.get(path)
+        ]
+        self.snapshot = current
+        return sorted(changed)
+
+
+def start_inotify(directory: str, on_change: Callable[[str], None]):
+    """Watch a tree with watchdog's native observer; None if that's unavailable
+
+    Directory modification events are ignored, since any change inside a
+    directory produces one and the file's own event follows.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        logger.warning("watchdog is not installed, falling back to polling")
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.event_type in ("opened", "closed_no_write"):
+                return
+            if event.is_directory and event.event_type == "modified":
+                return
+            on_change(os.fsdecode(event.src_path))
+            if getattr(event, "dest_path", None):
+                on_change(os.fsdecode(event.dest_path))
+
+    observer = Observer()
+    try:
+        observer.schedule(Handler(), directory, recursive=True)
+        observer.start()
+    except OSError as e:
+        # e.g. the inotify watch limit is exhausted
+        logger.warning(f"Cannot watch {directory} ({e}), falling back to polling")
+        return None
+    return observer
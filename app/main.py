@@ -2,6 +2,8 @@
 
 import os
 import asyncio
+import functools
+import uuid
 from typing import Dict, Any
 from fastapi import FastAPI, Request, Response, BackgroundTasks
 from slack_bolt.async_app import AsyncApp
@@ -9,6 +11,9 @@ from slack_bolt.adapter.fastapi.async_handler import AsyncSlackRequestHandler
 
 # Import our unified core agent
 from .core_agent import get_agent, TaskStatus
+from .slack_streaming import SlackMessageStreamer
+from .work_queue import WorkQueue, QueueFullError
+from .metrics import render_metrics, mark_worker_dead
 
 # --- FastAPI & Slack App Initialization ---
 app = FastAPI()
@@ -20,15 +25,33 @@ slack_app = AsyncApp(
 
 app_handler = AsyncSlackRequestHandler(slack_app)
 
+# Streaming answer updates: edit the message every N tokens or interval seconds
+STREAM_UPDATE_INTERVAL = float(os.getenv("STREAM_UPDATE_INTERVAL", "0.5"))
+STREAM_UPDATE_TOKENS = int(os.getenv("STREAM_UPDATE_TOKENS", "40"))
+
+# Admission control: questions run on a fixed worker pool behind a bounded queue
+question_queue = WorkQueue(
+    workers=int(os.getenv("QUEUE_WORKERS", "4")),
+    max_depth=int(os.getenv("QUEUE_MAX_DEPTH", "50")),
+)
+
+BUSY_MESSAGE = "<@{user_id}> 抱歉，目前問題量過多，請稍後再試。:no_entry:"
+
 # --- Slack Event Handlers ---
 
 # Store for tracking ongoing tasks
 active_tasks: Dict[str, Dict[str, Any]] = {}
 
 
-async def process_question_background(question: str, user_id: str, say_func, logger):
-    """Background task for processing questions with progress updates"""
-    task_id = f"{user_id}_{hash(question)}"
+async def process_question_background(
+    question: str, user_id: str, say_func, logger, streamer=None
+):
+    """Background task for processing questions with progress updates
+
+    With a streamer the answer is written into the acknowledgment message as
+    it is generated; otherwise the final answer is posted as a new message.
+    """
+    task_id = f"{user_id}_{uuid.uuid4().hex[:8]}"
 
     try:
         # Initialize task tracking
@@ -42,7 +65,9 @@ async def process_question_background(question: str, user_id: str, say_func, log
         agent = get_agent()
 
         # Process question with progress updates
-        result = await agent.process_question(question)
+        result = await agent.process_question(
+            question, on_token=streamer.update if streamer else None
+        )
 
         # Extract final answer
         final_answer = result.get("generation", "抱歉，我無法處理您的問題。")
@@ -54,10 +79,14 @@ async def process_question_background(question: str, user_id: str, say_func, log
 
         # Send final response
         if status == TaskStatus.COMPLETED or final_answer:
-            await say_func(f"<@{user_id}> {final_answer}")
+            reply = f"<@{user_id}> {final_answer}"
         else:
             error_msg = result.get("error_message", "處理過程中發生未知錯誤")
-            await say_func(f"<@{user_id}> 抱歉，處理您的問題時發生錯誤：{error_msg}")
+            reply = f"<@{user_id}> 抱歉，處理您的問題時發生錯誤：{error_msg}"
+
+        # Post the reply if the streamed message can't be edited, e.g. it was deleted
+        if not streamer or not await streamer.finish(reply):
+            await say_func(reply)
 
         logger.info(f"Task {task_id} completed with status: {status}")
 
@@ -66,7 +95,10 @@ async def process_question_background(question: str, user_id: str, say_func, log
         active_tasks[task_id]["status"] = TaskStatus.FAILED
         active_tasks[task_id]["error"] = str(e)
 
-        await say_func(f"<@{user_id}> 抱歉，處理您的問題時發生了錯誤。請稍後再試。")
+        error_reply = f"<@{user_id}> 抱歉，處理您的問題時發生了錯誤。請稍後再試。"
+        # Replace the partial answer so it doesn't look unfinished
+        if not streamer or not await streamer.finish(error_reply):
+            await say_func(error_reply)
 
     finally:
         # Clean up task after completion
@@ -74,8 +106,16 @@ async def process_question_background(question: str, user_id: str, say_func, log
             del active_tasks[task_id]
 
 
+async def process_after_ack(
+    acked: asyncio.Future, question: str, user_id: str, say_func, logger
+):
+    """Wait until the acknowledgment is posted, then answer into it"""
+    streamer = await acked
+    await process_question_background(question, user_id, say_func, logger, streamer)
+
+
 @slack_app.event("app_mention")
-async def handle_app_mentions(body, say, logger):
+async def handle_app_mentions(body, say, client, logger):
     """Handles mentions of the bot with async background processing"""
     user_question = body["event"]["text"].split(">")[-1].strip()
     user_id = body["event"]["user"]
@@ -83,13 +123,46 @@ async def handle_app_mentions(body, say, logger):
 
     logger.info(f"Received question from {user_id} in {channel_id}: {user_question}")
 
-    # Immediate acknowledgment
-    await say(f"收到您的問題，<@{user_id}>！正在處理中... :hourglass_flowing_sand:")
-
-    # Start background processing
-    asyncio.create_task(
-        process_question_background(user_question, user_id, say, logger)
-    )
+    # Take a queue slot before acknowledging, so a burst of mentions arriving
+    # while the acknowledgment is posted can't fill the queue behind our back
+    acked = asyncio.get_running_loop().create_future()
+    try:
+        position = question_queue.submit(
+            functools.partial(
+                process_after_ack, acked, user_question, user_id, say, logger
+            )
+        )
+    except QueueFullError:
+        logger.warning(f"Rejecting question, queue full: {question_queue.stats()}")
+        await say(BUSY_MESSAGE.format(user_id=user_id))
+        return
+
+    # Immediate acknowledgment; the answer is streamed into this message
+    streamer = None
+    try:
+        if position > 0:
+            ack_text = (
+                f"收到您的問題，<@{user_id}>！目前忙碌中，"
+                f"您的問題排在第 {position} 位... :hourglass_flowing_sand:"
+            )
+        else:
+            ack_text = (
+                f"收到您的問題，<@{user_id}>！正在處理中... :hourglass_flowing_sand:"
+            )
+        ack = await say(ack_text)
+        if ack and ack.get("ts"):
+            streamer = SlackMessageStreamer(
+                client,
+                ack.get("channel", channel_id),
+                ack["ts"],
+                prefix=f"<@{user_id}> ",
+                min_interval=STREAM_UPDATE_INTERVAL,
+                min_tokens=STREAM_UPDATE_TOKENS,
+            )
+    finally:
+        # Without a streamer the answer is posted as a new message
+        if not acked.done():
+            acked.set_result(streamer)
 
 
 # --- FastAPI Webhook Endpoint ---
@@ -104,3 +177,22 @@ async def endpoint(req: Request):
 @app.get("/")
 async def root():
     return {"status": "ok"}
+
+
+@app.get("/queue")
+async def queue_status():
+    """Queue depth, in-flight jobs and wait times for this worker process"""
+    return question_queue.stats()
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics, aggregated across all uvicorn workers"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+@app.on_event("shutdown")
+async def release_worker_metrics():
+    """Stop counting this worker's queue gauges once it exits"""
+    mark_worker_dead(os.getpid())
@@ -0,0 +1,164 @@
+"""
+Prometheus metrics for SunnetChat.
+Production runs several uvicorn workers, each with its own agent and queue,
+so when PROMETHEUS_MULTIPROC_DIR is set every worker writes its samples
+there and /metrics aggregates all of them into one scrape. The Docker
+image sets it for the API's workers only; ingest scripts and the watcher
+are single processes and use the default registry.
+"""
+
+import os
+import logging
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+# LLM-bound steps range from milliseconds (cache hits) to minutes (cold Ollama)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+NODE_LATENCY = Histogram(
+    "sunnetchat_graph_node_duration_seconds",
+    "Time spent in each LangGraph node",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+
+QUESTION_LATENCY = Histogram(
+    "sunnetchat_question_duration_seconds",
+    "End-to-end time to answer a question, by answer source",
+    ["source"],
+    buckets=LATENCY_BUCKETS,
+)
+
+ANSWERS = Counter(
+    "sunnetchat_answers_total",
+    "Answered questions by source (vectorstore, web_search, cache, error)",
+    ["source"],
+)
+
+RETRIES = Counter(
+    "sunnetchat_retries_total",
+    "Retried calls to external dependencies",
+    ["dependency"],
+)
+
+CIRCUIT_REJECTIONS = Counter(
+    "sunnetchat_circuit_rejections_total",
+    "Calls failed fast because a dependency's circuit was open",
+    ["dependency"],
+)
+
+GRADING = Counter(
+    "sunnetchat_grading_total",
+    "Document grading decisions by method",
+    ["method"],
+)
+
+COALESCED = Counter(
+    "sunnetchat_coalesced_questions_total",
+    "Questions that joined an identical in-flight run",
+)
+
+SPECULATIVE_SEARCHES = Counter(
+    "sunnetchat_speculative_searches_total",
+    "Web searches started alongside grading, by outcome (used, discarded, failed)",
+    ["outcome"],
+)
+
+SPECULATION_SAVED = Counter(
+    "sunnetchat_speculation_saved_seconds_total",
+    "Latency saved by overlapping web search with grading",
+)
+
+ANSWER_CACHE_LOOKUPS = Counter(
+    "sunnetchat_answer_cache_lookups_total",
+    "Semantic answer cache lookups by result",
+    ["result"],
+)
+
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "sunnetchat_embedding_cache_lookups_total",
+    "Persistent embedding cache lookups by result",
+    ["result"],
+)
+
+QUEUE_DEPTH = Gauge(
+    "sunnetchat_queue_depth",
+    "Questions waiting for a worker",
+    multiprocess_mode="livesum",
+)
+
+QUEUE_IN_FLIGHT = Gauge(
+    "sunnetchat_queue_in_flight",
+    "Questions currently being processed",
+    multiprocess_mode="livesum",
+)
+
+QUEUE_WAIT = Histogram(
+    "sunnetchat_queue_wait_seconds",
+    "Time questions spent waiting in the queue",
+    buckets=LATENCY_BUCKETS,
+)
+
+QUEUE_REJECTED = Counter(
+    "sunnetchat_queue_rejected_total",
+    "Questions rejected because the queue was full",
+)
+
+# Continuous ingestion (scripts/watch_ingest.py)
+INGEST_LAG_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+INGEST_BACKLOG = Gauge(
+    "sunnetchat_ingest_backlog_files",
+    "Changed files waiting to be ingested",
+    multiprocess_mode="livesum",
+)
+
+INGEST_OLDEST_PENDING = Gauge(
+    "sunnetchat_ingest_oldest_pending_seconds",
+    "Age of the oldest file change not yet ingested",
+    multiprocess_mode="livemax",
+)
+
+INGEST_LAG = Histogram(
+    "sunnetchat_ingest_lag_seconds",
+    "Time from a file change to its chunks being searchable",
+    buckets=INGEST_LAG_BUCKETS,
+)
+
+INGEST_FILES = Counter(
+    "sunnetchat_ingest_files_total",
+    "Files handled by the ingest watcher by result",
+    ["result"],
+)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """The registry to expose: all workers' samples in multiprocess mode"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Serialize current metrics, aggregating all workers in multiprocess mode"""
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid: int):
+    """Drop a finished worker's live gauges from the aggregated view"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
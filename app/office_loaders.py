@@ -0,0 +1,94 @@
+"""
+Fast loaders for PowerPoint and Excel files.
+unstructured partitions every shape and cell into elements and renders
+spreadsheets as HTML tables before extracting text, which dominates parse
+time for large decks and workbooks. These read the text directly with
+python-pptx and openpyxl, one slide or sheet at a time.
+"""
+
+from typing import Iterable, Iterator, List
+
+from langchain_core.documents import Document
+from langchain_core.document_loaders import BaseLoader
+
+
+def _shape_texts(shapes: Iterable) -> Iterator[str]:
+    """Text of each shape in reading order, descending into groups"""
+    for shape in shapes:
+        if hasattr(shape, "shapes"):
+            yield from _shape_texts(shape.shapes)
+        elif getattr(shape, "has_text_frame", False) and shape.has_text_frame:
+            yield shape.text_frame.text
+        elif getattr(shape, "has_table", False) and shape.has_table:
+            for row in shape.table.rows:
+                yield " | ".join(cell.text for cell in row.cells)
+
+
+class PptxLoader(BaseLoader):
+    """Loads a .pptx as one Document per slide, speaker notes included
+
+    Slides are numbered from 0 in the "page" metadata, like PDF pages.
+    Slides without any text are skipped.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def lazy_load(self) -> Iterator[Document]:
+        from pptx import Presentation
+
+        presentation = Presentation(self.file_path)
+        total_pages = len(presentation.slides)
+        for number, slide in enumerate(presentation.slides):
+            parts = list(_shape_texts(slide.shapes))
+            if slide.has_notes_slide:
+                parts.append(slide.notes_slide.notes_text_frame.text)
+            text = "\n".join(part for part in parts if part.strip())
+            if not text:
+                continue
+            yield Document(
+                page_content=text,
+                metadata={
+                    "source": self.file_path,
+                    "page": number,
+                    "total_pages": total_pages,
+                },
+            )
+
+
+class XlsxLoader(BaseLoader):
+    """Loads an .xlsx as one Document per sheet of tab-separated rows
+
+    The workbook is opened read-only, so rows are streamed rather than
+    loaded at once, and formulas contribute their cached values. Empty
+    rows and sheets are skipped.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def lazy_load(self) -> Iterator[Document]:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            for number, sheet in enumerate(workbook.worksheets):
+                lines: List[str] = []
+                for row in sheet.iter_rows(values_only=True):
+                    values = ["" if value is None else str(value) for value in row]
+                    while values and not values[-1]:
+                        values.pop()
+                    if values:
+                        lines.append("\t".join(values))
+                if not lines:
+                    continue
+                yield Document(
+                    page_content="\n".join(lines),
+                    metadata={
+                        "source": self.file_path,
+                        "sheet": sheet.title,
+                        "page": number,
+                    },
+                )
+        finally:
+            workbook.close()
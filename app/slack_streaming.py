@@ -0,0 +1,76 @@
+"""
+Incremental Slack message updates for streamed answers.
+Edits a single posted message via chat.update as the answer grows,
+rate limited so long generations do not exhaust the Slack API quota.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SlackMessageStreamer:
+    """Edits one Slack message in place while an answer streams in"""
+
+    def __init__(
+        self,
+        client,
+        channel: str,
+        ts: str,
+        prefix: str = "",
+        min_interval: float = 0.5,
+        min_tokens: int = 40,
+    ):
+        self.client = client
+        self.channel = channel
+        self.ts = ts
+        self.prefix = prefix
+        self.min_interval = min_interval
+        self.min_tokens = min_tokens
+        self.updates_sent = 0
+        self._tokens_since_update = 0
+        # The first token is shown immediately
+        self._last_update = float("-inf")
+        self._pending: Optional[asyncio.Task] = None
+
+    async def _send(self, text: str) -> bool:
+        """Edit the message; False if Slack rejected the update"""
+        try:
+            await self.client.chat_update(channel=self.channel, ts=self.ts, text=text)
+            self.updates_sent += 1
+            return True
+        except Exception as e:
+            logger.warning(f"Slack message update failed: {e}")
+            return False
+
+    async def update(self, text: str):
+        """Push the partial answer when the token or time cadence allows"""
+        self._tokens_since_update += 1
+
+        due = (
+            self._tokens_since_update >= self.min_tokens
+            or time.monotonic() - self._last_update >= self.min_interval
+        )
+        if not due or (self._pending and not self._pending.done()):
+            # The next due update carries the latest text anyway
+            return
+
+        self._tokens_since_update = 0
+        self._last_update = time.monotonic()
+        # Don't hold up token generation on the Slack round trip
+        self._pending = asyncio.create_task(
+            self._send(f"{self.prefix}{text} :writing_hand:")
+        )
+
+    async def finish(self, text: str) -> bool:
+        """Replace the message with the final, fully formatted reply
+
+        Returns False if the message could not be edited, in which case the
+        caller should post the reply some other way.
+        """
+        if self._pending:
+            await self._pending
+        return await self._send(text)
@@ -0,0 +1,155 @@
+"""
+Sentence-aware text splitting for mixed Traditional Chinese / English text.
+RecursiveCharacterTextSplitter's default separators know nothing about
+Chinese punctuation, so zh-TW text is cut mid-sentence after a slow
+character-level recursion. This splitter finds sentence boundaries in one
+regex pass and packs whole sentences into chunks.
+"""
+
+import re
+import copy
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import TextSplitter
+
+# Sentence ends: CJK and ASCII terminators with any closing quotes or
+# brackets, an ASCII period followed by whitespace, or a blank line. Single
+# line breaks are usually PDF line wrapping inside a sentence.
+_SENTENCE_END = re.compile(
+    r"[。！？；!?;…]+[」』”’）》〉\"')\]]*|\.(?=\s)[\"')\]]*|\n[ \t]*\n\s*"
+)
+# Softer breaks for sentences that alone exceed the chunk size
+_CLAUSE_END = re.compile(r"[，、：,:]+|\s+")
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_TOKEN = re.compile(rf"[{_CJK}]|[^\W_{_CJK}]+|[^\w\s]")
+
+
+def approx_token_length(text: str) -> int:
+    """Cheap token estimate: one per CJK character, one per word or symbol
+
+    Close to what subword tokenizers produce for zh-TW/English text, without
+    loading a tokenizer; use `SentenceSplitter.from_tiktoken_encoder` or
+    `from_huggingface_tokenizer` for exact counts.
+    """
+    return len(_TOKEN.findall(text))
+
+
+class SentenceSplitter(TextSplitter):
+    """Single-pass splitter that keeps sentences whole
+
+    Sentences are packed into chunks of at most chunk_size, measured with
+    length_function (characters by default), and consecutive chunks share
+    whole trailing sentences of up to chunk_overlap. A sentence longer than
+    a chunk is broken at commas, then spaces, then hard at the size limit.
+    Chunks are exact slices of the input, so start indices are exact too.
+    """
+
+    def _length(self, text: str, start: int, end: int) -> int:
+        if self._length_function is len:
+            return end - start
+        return self._length_function(text[start:end])
+
+    def _pieces(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(start, end) of each sentence, split further where too long"""
+        start = 0
+        for match in _SENTENCE_END.finditer(text):
+            end = match.end()
+            if end - start <= self._chunk_size and self._length_function is len:
+                yield start, end
+            else:
+                yield from self._fit(text, start, end)
+            start = end
+        if start < len(text):
+            yield from self._fit(text, start, len(text))
+
+    def _fit(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        """Break a sentence longer than chunk_size at clause ends, else hard"""
+        if self._length(text, start, end) <= self._chunk_size:
+            yield start, end
+            return
+        breaks = [m.end() for m in _CLAUSE_END.finditer(text, start, end)] + [end]
+        last_fit = start
+        for brk in breaks:
+            if self._length(text, start, brk) <= self._chunk_size:
+                last_fit = brk
+                continue
+            if last_fit > start:
+                yield start, last_fit
+                start = last_fit
+            while self._length(text, start, brk) > self._chunk_size:
+                yield start, start + self._chunk_size
+                start += self._chunk_size
+            last_fit = brk
+        if start < end:
+            yield start, end
+
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) offsets of each chunk of text"""
+        spans = []
+        window: deque = deque()  # (start, end, length) of sentences in the chunk
+        total = 0
+
+        def emit():
+            start, end = window[0][0], window[-1][1]
+            if self._strip_whitespace:
+                chunk = text[start:end]
+                start += len(chunk) - len(chunk.lstrip())
+                end -= len(chunk) - len(chunk.rstrip())
+            if end > start:
+                spans.append((start, end))
+
+        for start, end in self._pieces(text):
+            length = self._length(text, start, end)
+            if window and total + length > self._chunk_size:
+                emit()
+                # Carry whole trailing sentences into the next chunk as overlap
+                while window and (
+                    total > self._chunk_overlap or total + length > self._chunk_size
+                ):
+                    total -= window.popleft()[2]
+            window.append((start, end, length))
+            total += length
+        if window:
+            emit()
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def create_documents(
+        self, texts: List[str], metadatas: Optional[List[Dict[Any, Any]]] = None
+    ) -> List[Document]:
+        metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        for text, metadata in zip(texts, metadatas):
+            for start, end in self.split_spans(text):
+                chunk_metadata = copy.deepcopy(metadata)
+                if self._add_start_index:
+                    chunk_metadata["start_index"] = start
+                documents.append(
+                    Document(page_content=text[start:end], metadata=chunk_metadata)
+                )
+        return documents
+
+
+def make_splitter(
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    length: str = "chars",
+    **kwargs: Any,
+) -> SentenceSplitter:
+    """SentenceSplitter measuring length in characters or approximate tokens"""
+    length_functions: Dict[str, Callable[[str], int]] = {
+        "chars": len,
+        "tokens": approx_token_length,
+    }
+    if length not in length_functions:
+        raise ValueError(f"Unknown chunk length unit: {length}")
+    return SentenceSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=length_functions[length],
+        **kwargs,
+    )
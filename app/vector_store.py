@@ -3,7 +3,7 @@ from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore
 from langchain_community.vectorstores import Chroma
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from .text_splitter import SentenceSplitter
 
 
 def build_vector_store(
@@ -20,7 +20,7 @@ def build_vector_store(
         A VectorStore object containing the vectorized documents.
     """
     # 1. Split documents into smaller chunks for better retrieval accuracy
-    text_splitter = RecursiveCharacterTextSplitter(
+    text_splitter = SentenceSplitter(
         chunk_size=1000,
         chunk_overlap=200,
         length_function=len,
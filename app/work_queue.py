@@ -0,0 +1,120 @@
+"""
+Bounded async work queue for Slack question processing.
+A fixed pool of workers drains the queue so bursts of mentions cannot
+oversubscribe Ollama, and every running job stays referenced until it ends.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds its maximum number of waiting jobs"""
+
+
+class WorkQueue:
+    """Fixed-size worker pool fed by a bounded FIFO queue"""
+
+    def __init__(self, workers: int = 4, max_depth: int = 50):
+        self.workers = workers
+        self.max_depth = max_depth
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize() if self._queue else 0
+
+    def _ensure_started(self):
+        """Start the workers on the running loop the first time work arrives"""
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"question-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    def is_full(self) -> bool:
+        return self.depth >= self.max_depth
+
+    def next_position(self) -> int:
+        """Queue position a job submitted now would get; 0 means it starts at once"""
+        idle_workers = self.workers - self.in_flight
+        return max(self.depth + 1 - idle_workers, 0)
+
+    def submit(self, job: Job) -> int:
+        """Enqueue a job and return its position (0 when a worker is free)"""
+        self._ensure_started()
+        position = self.next_position()
+        try:
+            self._queue.put_nowait((job, time.monotonic()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            metrics.QUEUE_REJECTED.inc()
+            raise QueueFullError(f"Work queue is full ({self.max_depth} waiting)")
+        metrics.QUEUE_DEPTH.inc()
+        return position
+
+    async def _worker(self):
+        while True:
+            job, enqueued_at = await self._queue.get()
+            wait = time.monotonic() - enqueued_at
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            self.in_flight += 1
+            metrics.QUEUE_DEPTH.dec()
+            metrics.QUEUE_IN_FLIGHT.inc()
+            metrics.QUEUE_WAIT.observe(wait)
+            try:
+                await job()
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Queued job failed after waiting {wait:.2f}s: {e}")
+            finally:
+                self.in_flight -= 1
+                metrics.QUEUE_IN_FLIGHT.dec()
+                self._queue.task_done()
+
+    async def join(self):
+        """Wait until every submitted job has finished"""
+        if self._queue:
+            await self._queue.join()
+
+    async def stop(self):
+        """Cancel the workers; jobs still waiting are dropped"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        metrics.QUEUE_DEPTH.dec(self.depth)
+
+    def stats(self) -> Dict[str, Any]:
+        started = self.processed + self.failed + self.in_flight
+        return {
+            "workers": self.workers,
+            "max_depth": self.max_depth,
+            "depth": self.depth,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": self.total_wait_seconds / started if started else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
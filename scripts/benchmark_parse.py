@@ -0,0 +1,64 @@
+"""
+Benchmark document parsing across parse worker counts.
+
+Usage: python scripts/benchmark_parse.py [SOURCE_DIR] --workers 1 2 4 8 16
+
+Parses every file under SOURCE_DIR (default SOURCE_DOCS_PATH) once per
+worker count with the same process pool as ingest.py and prints wall time,
+throughput and speedup relative to the first count. The parse cache is
+bypassed, so every run really parses every file.
+"""
+import os
+import time
+import argparse
+
+from ingest import (
+    SOURCE_DIRECTORY,
+    PARSE_TIMEOUT,
+    discover_files,
+    parse_and_split,
+    parse_files,
+)
+
+
+def run(paths, workers, timeout):
+    started = time.perf_counter()
+    parse_seconds, failed, chunks = 0.0, 0, 0
+    for _, result, seconds, error in parse_files(paths, workers, timeout, parse_and_split):
+        parse_seconds += seconds
+        if error:
+            failed += 1
+        else:
+            chunks += len(result)
+    return time.perf_counter() - started, parse_seconds, failed, chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parse scaling across cores")
+    parser.add_argument("source", nargs="?", default=SOURCE_DIRECTORY)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+    )
+    parser.add_argument("--parse-timeout", type=float, default=PARSE_TIMEOUT)
+    parser.add_argument("--limit", type=int, default=None, help="parse at most N files")
+    args = parser.parse_args()
+
+    paths = list(discover_files(args.source))[:args.limit]
+    print(f"Benchmarking {len(paths)} files from {args.source} on {os.cpu_count()} cores")
+    print(f"{'workers':>7} {'wall s':>9} {'files/s':>9} {'speedup':>8} {'cpu s':>9} {'failed':>6} {'chunks':>7}")
+
+    baseline = None
+    for workers in args.workers:
+        wall, parse_seconds, failed, chunks = run(paths, workers, args.parse_timeout)
+        baseline = baseline or wall
+        print(
+            f"{workers:>7} {wall:>9.1f} {len(paths) / wall:>9.2f} "
+            f"{baseline / wall:>7.2f}x {parse_seconds:>9.1f} {failed:>6} {chunks:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
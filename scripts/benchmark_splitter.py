@@ -0,0 +1,76 @@
+"""
+Benchmark the sentence splitter against RecursiveCharacterTextSplitter.
+
+Usage: python scripts/benchmark_splitter.py [SOURCE_DIR] --limit 200 --repeat 3
+
+Parses files under SOURCE_DIR (default SOURCE_DOCS_PATH) once, through the
+parse cache, then splits the text with both splitters at the ingest chunk
+settings and prints throughput, chunk counts, mean chunk length and the
+share of chunks that end on a sentence boundary.
+"""
+import time
+import argparse
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from ingest import (
+    CHUNK_LENGTH,
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    SOURCE_DIRECTORY,
+    discover_files,
+    load_document,
+)
+from app.text_splitter import make_splitter
+
+SENTENCE_ENDINGS = tuple("。！？；.!?;…」』”）")
+
+
+def run(splitter, texts, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = [chunk for text in texts for chunk in splitter.split_text(text)]
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    whole = sum(1 for chunk in chunks if chunk.rstrip().endswith(SENTENCE_ENDINGS))
+    return best, chunks, whole
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text splitters")
+    parser.add_argument("source", nargs="?", default=SOURCE_DIRECTORY)
+    parser.add_argument("--limit", type=int, default=None, help="use at most N files")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per splitter")
+    args = parser.parse_args()
+
+    texts = []
+    for path in list(discover_files(args.source))[:args.limit]:
+        try:
+            texts.extend(doc.page_content for doc in load_document(path))
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+    characters = sum(len(text) for text in texts)
+    print(
+        f"Splitting {characters / 1e6:.1f}M characters from {len(texts)} documents "
+        f"(chunk size {CHUNK_SIZE} {CHUNK_LENGTH}, overlap {CHUNK_OVERLAP})"
+    )
+    print(f"{'splitter':>10} {'best s':>8} {'MB/s':>7} {'chunks':>7} {'mean len':>8} {'whole':>6}")
+
+    splitters = {
+        "recursive": RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+        ),
+        "sentence": make_splitter(CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_LENGTH),
+    }
+    for name, splitter in splitters.items():
+        seconds, chunks, whole = run(splitter, texts, args.repeat)
+        mean = sum(len(chunk) for chunk in chunks) / len(chunks) if chunks else 0
+        print(
+            f"{name:>10} {seconds:>8.2f} {characters / 1e6 / seconds if seconds else 0:>7.1f} "
+            f"{len(chunks):>7} {mean:>8.0f} {whole / len(chunks) if chunks else 0:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,1360 @@
 import os
-from langchain_community.document_loaders import DirectoryLoader, UnstructuredFileLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import sys
+import json
+import hashlib
+import time
+import heapq
+import queue
+import signal
+import argparse
+import gzip
+import glob
+import threading
+import functools
+from collections import defaultdict, deque
+from itertools import repeat
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+from importlib import metadata as package_metadata
+from langchain_core.documents import Document
+from langchain_community.document_loaders import UnstructuredFileLoader
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 import chromadb
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core_agent import Config
+from app.embedding_cache import CachedEmbeddings, EmbeddingStore
+from app.pdf_loader import MIN_PAGE_CHARS, TextFirstPDFLoader
+from app.data_processor import (
+    FormatStats,
+    detect_mime_type,
+    format_name,
+    get_loader,
+    magic,
+    registered_loaders,
+)
+from app.dedup import MAX_DISTANCE, SimHashIndex, simhash
+from app.text_splitter import make_splitter
+from app.collection_alias import (
+    garbage_collect,
+    list_versions,
+    resolve_collection,
+    switch_alias,
+    version_name,
+)
+
 # --- Configuration ---
 SOURCE_DIRECTORY = os.getenv("SOURCE_DOCS_PATH", "/app/local_documents")
 CHROMA_HOST = os.getenv("CHROMA_HOST", "chromadb")
 CHROMA_PORT = os.getenv("CHROMA_PORT", "8000")
-COLLECTION_NAME = "internal_sop"
-
-def main():
-    print(f"Starting ingestion from: {SOURCE_DIRECTORY}")
-
-    # 1. Load Documents
-    # Use DirectoryLoader with UnstructuredFileLoader for various file types
-    loader = DirectoryLoader(
-        SOURCE_DIRECTORY,
-        glob="**/*.*",
-        use_multithreading=True,
-        show_progress=True,
-        loader_cls=lambda path: UnstructuredFileLoader(path)
+# Alias the agent resolves; full builds go to versioned <name>_v<N> collections
+COLLECTION_NAME = Config.COLLECTION_NAME
+KEEP_VERSIONS = int(os.getenv("INGEST_KEEP_VERSIONS", "2"))
+# A new version must hold at least this share of the live version's chunks
+MIN_CHUNK_RATIO = float(os.getenv("INGEST_MIN_CHUNK_RATIO", "0.5"))
+VALIDATION_SAMPLES = 5
+# Manifest of path -> content hash / mtime / chunk IDs, used by --incremental
+MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", "data/ingest_manifest.json")
+# Progress of an unfinished run, so --resume can continue it after a crash
+CHECKPOINT_PATH = os.getenv("INGEST_CHECKPOINT_PATH", "data/ingest_checkpoint.json")
+CHECKPOINT_INTERVAL = float(os.getenv("INGEST_CHECKPOINT_INTERVAL", "10"))
+BATCH_SIZE = 100
+# Chunks hold whole sentences up to this size, in "chars" or approximate "tokens"
+CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "200"))
+CHUNK_LENGTH = os.getenv("INGEST_CHUNK_LENGTH", "chars")
+# Parsing (unstructured + tesseract OCR) is CPU-bound, so it runs in processes
+PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", str(os.cpu_count() or 1)))
+PARSE_TIMEOUT = float(os.getenv("INGEST_PARSE_TIMEOUT", "300"))
+# Options handed to unstructured; they, with its version, key the parse cache
+PARSE_STRATEGY = os.getenv("INGEST_PARSE_STRATEGY", "auto")
+OCR_LANGUAGES = [lang for lang in os.getenv("INGEST_OCR_LANGUAGES", "").split(",") if lang]
+# Parsed documents by content hash, so re-chunking never re-runs OCR; "" disables
+PARSE_CACHE_DIR = os.getenv("INGEST_PARSE_CACHE_DIR", "data/parse_cache")
+# Files buffered between pipeline stages; peak memory scales with this and
+# the parse workers, not with the size of the corpus
+QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
+# Embed with the model the agent queries with, in provider-sized batches
+EMBEDDING_MODEL = Config.EMBEDDING_MODEL
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "100"))
+EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+# Provider budget; 0 disables a limit
+EMBED_RPM = int(os.getenv("INGEST_EMBED_RPM", "1500"))
+EMBED_TPM = int(os.getenv("INGEST_EMBED_TPM", "1000000"))
+# Near-duplicate chunks (copies and revisions across files) are stored once
+DEDUP_ENABLED = os.getenv("INGEST_DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_DISTANCE = int(os.getenv("INGEST_DEDUP_DISTANCE", str(MAX_DISTANCE)))
+EMBED_RETRIES = 5
+EMBED_RETRY_DELAY = 2.0
+
+# start_index records where each chunk sits in its source document
+text_splitter = make_splitter(CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_LENGTH, add_start_index=True)
+
+
+_END = object()
+
+
+class _StageError:
+    def __init__(self, error):
+        self.error = error
+
+
+def bounded_stage(items, maxsize=QUEUE_SIZE, name="stage"):
+    """Run an iterator in a background thread, handing its items over a bounded queue
+
+    The producer blocks while the queue is full, so a slow downstream stage
+    holds back the upstream ones instead of letting work pile up in memory,
+    while both sides still run at the same time. Producer exceptions are
+    re-raised in the consumer.
+    """
+    handoff = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                handoff.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_END)
+        except Exception as e:
+            put(_StageError(e))
+        finally:
+            close = getattr(items, "close", None)
+            if close:
+                close()
+
+    threading.Thread(target=produce, name=f"ingest-{name}", daemon=True).start()
+    try:
+        while True:
+            item = handoff.get()
+            if item is _END:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+def discover_files(source_dir):
+    """Yield every file under source_dir matching the old "**/*.*" glob"""
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if "." in name:
+                yield os.path.join(root, name)
+
+
+def hash_file(path):
+    """SHA-256 of a file's content, read in 1 MiB blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(data, path):
+    """Write JSON atomically so a crash never leaves the file half-written"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    write_json(manifest, path)
+
+
+def manifest_path(collection_name):
+    """Where one collection version's manifest lives: MANIFEST_PATH plus the version name
+
+    A version's manifest is written before the alias switches to it, and the
+    watcher, still syncing the old version meanwhile, writes only the old
+    version's file, so neither can load or overwrite the other's state.
+    """
+    root, ext = os.path.splitext(MANIFEST_PATH)
+    return f"{root}.{collection_name}{ext}"
+
+
+def load_collection_manifest(collection_name):
+    """The manifest of a collection version"""
+    path = manifest_path(collection_name)
+    if not os.path.exists(path) and os.path.exists(MANIFEST_PATH):
+        # Written before manifests were kept per version, for the then-live version
+        path = MANIFEST_PATH
+    return load_manifest(path)
+
+
+def manifest_paths():
+    """Every manifest on disk, per version and legacy"""
+    root, ext = os.path.splitext(MANIFEST_PATH)
+    return sorted(glob.glob(f"{glob.escape(root)}.*{ext}")) + [
+        path for path in [MANIFEST_PATH] if os.path.exists(path)
+    ]
+
+
+class Checkpoint:
+    """Durable record of what an unfinished run has committed, for --resume
+
+    Holds the run's mode ("full" or "incremental"), the collection it writes
+    to and its manifest. A file only enters the manifest once all of its
+    batches are written, and the checkpoint is saved as files commit (at
+    most every `interval` seconds) and when the run stops. On resume the
+    manifest skips committed files without re-parsing them; chunk IDs are
+    content-addressed, so batches already written for a file that was still
+    in flight are found in the collection and not embedded again.
+    """
+
+    def __init__(self, path, mode, collection, manifest, interval=None, clock=time.monotonic):
+        self.path = path
+        self.mode = mode
+        self.collection = collection
+        self.manifest = manifest
+        self.interval = CHECKPOINT_INTERVAL if interval is None else interval
+        self.batches = 0  # written by earlier attempts of this run
+        self.run_batches = 0
+        self._clock = clock
+        self._saved_at = None
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        checkpoint = cls(path, state["mode"], state["collection"], state["manifest"])
+        checkpoint.batches = state.get("batches", 0)
+        return checkpoint
+
+    def committed(self, batches):
+        """Note progress (batches written this attempt), saving when due"""
+        self.run_batches = batches
+        if self._saved_at is None or self._clock() - self._saved_at >= self.interval:
+            self.save()
+
+    def save(self):
+        write_json(
+            {
+                "mode": self.mode,
+                "collection": self.collection,
+                "batches": self.batches + self.run_batches,
+                "saved_at": datetime.now().isoformat(),
+                "manifest": self.manifest,
+            },
+            self.path,
+        )
+        self._saved_at = self._clock()
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def parser_options():
+    options = {"mode": "single", "strategy": PARSE_STRATEGY}
+    if OCR_LANGUAGES:
+        options["languages"] = OCR_LANGUAGES
+    return options
+
+
+def pdf_ocr_languages():
+    return "+".join(OCR_LANGUAGES) or "chi_tra+eng"
+
+
+def parser_settings():
+    """Everything besides the file's bytes that decides what parsing returns"""
+    try:
+        version = package_metadata.version("unstructured")
+    except package_metadata.PackageNotFoundError:
+        version = None
+    return {
+        "loader": "unstructured",
+        "version": version,
+        **parser_options(),
+        "pdf": {"loader": "text_first", "min_chars": MIN_PAGE_CHARS, "ocr": pdf_ocr_languages()},
+        "fast_loaders": registered_loaders(),
+        "sniffing": magic is not None,
+    }
+
+
+class ParseCache:
+    """Parsed documents on disk, keyed by file content hash and parser settings
+
+    A file's parse (OCR above all) depends only on its bytes and the
+    parser, so rebuilding with another chunk size or embedding model reads
+    the text from here instead of parsing again. Each entry is a gzipped
+    JSON file written atomically, which is safe with concurrent parse
+    workers. Sources are stored without their path, so moved or copied
+    files hit the cache too.
+    """
+
+    def __init__(self, directory, settings=None):
+        self.directory = directory
+        settings = parser_settings() if settings is None else settings
+        self.settings_hash = hashlib.sha256(
+            json.dumps(settings, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def key(self, sha256):
+        return hashlib.sha256(f"{sha256}\0{self.settings_hash}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json.gz")
+
+    def get(self, sha256, source):
+        """Cached documents for a file's content, or None on a miss"""
+        path = self._path(self.key(sha256))
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable parse cache entry {path}: {e}")
+            return None
+        return [
+            Document(page_content=entry["text"], metadata={**entry["metadata"], "source": source})
+            for entry in entries
+        ]
+
+    def put(self, sha256, docs):
+        path = self._path(self.key(sha256))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entries = [
+            {
+                "text": doc.page_content,
+                "metadata": {k: v for k, v in doc.metadata.items() if k != "source"},
+            }
+            for doc in docs
+        ]
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def prune(self, keep_hashes):
+        """Delete entries for other contents or parser settings; returns (files, bytes)"""
+        keep = {f"{self.key(sha256)}.json.gz" for sha256 in keep_hashes}
+        removed, freed = 0, 0
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                if name in keep:
+                    continue
+                path = os.path.join(root, name)
+                freed += os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+        return removed, freed
+
+
+def unstructured_loader(path):
+    return UnstructuredFileLoader(path, **parser_options())
+
+
+def parse_document(path):
+    """Parse one file with the cheapest loader for its detected format
+
+    PDFs use their text layer and OCR only pages without one; formats
+    without a fast loader in app.data_processor go through unstructured.
+    """
+    mime_type = detect_mime_type(path)
+    if mime_type == "application/pdf":
+        return TextFirstPDFLoader(path, ocr_languages=pdf_ocr_languages()).load()
+    return get_loader(path, fallback=unstructured_loader, mime_type=mime_type).load()
+
+
+# Metadata flag on documents read from the parse cache; removed before splitting
+PARSE_CACHE_HIT = "parse_cache_hit"
+# How TextFirstPDFLoader can have extracted a page
+PDF_EXTRACTIONS = ("text_layer", "ocr", "ocr_failed", "empty")
+
+
+def load_document(path, sha256=None):
+    """Parse one file into documents, through the parse cache when enabled
+
+    sha256 is the file's content hash if the caller has already computed it.
+    """
+    if not PARSE_CACHE_DIR:
+        return parse_document(path)
+
+    cache = ParseCache(PARSE_CACHE_DIR)
+    if sha256 is None:
+        sha256 = hash_file(path)
+    docs = cache.get(sha256, path)
+    if docs is not None:
+        # Tells load_and_split not to count the replayed PDF extraction stats
+        for doc in docs:
+            doc.metadata[PARSE_CACHE_HIT] = True
+    else:
+        docs = parse_document(path)
+        try:
+            cache.put(sha256, docs)
+        except (OSError, TypeError, ValueError) as e:
+            # Metadata that isn't JSON-serializable, or a full disk
+            print(f"Could not cache parse of {path}: {e}")
+    return docs
+
+
+class ParsedChunks(list):
+    """A file's chunks, with whether its parse came from the cache and, for a
+    fresh PDF parse, its pages counted by extraction
+
+    The page counts are taken from the parsed pages, before splitting, so
+    blank pages and pages whose OCR failed are counted although they yield
+    no chunks.
+    """
+
+    def __init__(self, chunks, cached=False, pdf_pages=None):
+        super().__init__(chunks)
+        self.cached = cached
+        self.pdf_pages = pdf_pages or {}
+
+
+def load_and_split(path, sha256=None):
+    """Parse one file and split it into chunks"""
+    docs = load_document(path, sha256)
+    cached = any([doc.metadata.pop(PARSE_CACHE_HIT, False) for doc in docs])
+    return ParsedChunks(
+        text_splitter.split_documents(docs),
+        cached=cached,
+        # A cached parse's pages and OCR time were spent on an earlier run
+        pdf_pages=None if cached else count_pdf_pages(docs),
     )
-    docs = loader.load()
 
-    if not docs:
-        print("No documents found. Exiting.")
+
+def parse_and_split(path):
+    """Like load_and_split, but always parses, bypassing the parse cache"""
+    return text_splitter.split_documents(parse_document(path))
+
+
+def prune_parse_cache():
+    """Drop cached parses no file in any version's manifest still needs"""
+    if not PARSE_CACHE_DIR:
+        print("Parse cache is disabled")
         return
+    hashes = {
+        entry["sha256"]
+        for path in manifest_paths()
+        for entry in load_manifest(path).values()
+    }
+    removed, freed = ParseCache(PARSE_CACHE_DIR).prune(hashes)
+    print(
+        f"Pruned {removed} parse cache entries ({freed / 2**20:.1f} MiB), "
+        f"kept those of {len(hashes)} distinct files"
+    )
 
-    print(f"Loaded {len(docs)} documents.")
 
-    # 2. Split Documents
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    splits = text_splitter.split_documents(docs)
-    print(f"Split into {len(splits)} chunks.")
+class ParseTimeout(Exception):
+    """Raised inside a parse worker when a file exceeds the parse timeout"""
+
+
+def _raise_parse_timeout(signum, frame):
+    raise ParseTimeout()
+
+
+def parse_file(path, timeout=None, parse_fn=load_and_split, sha256=None):
+    """Parse one file, returning (chunks, seconds, error)
+
+    Runs in a worker process. A known content hash is passed on to parse_fn. The timeout is enforced with SIGALRM so a
+    pathological scan is interrupted inside the worker, which then moves on
+    to the next file instead of holding its slot for the rest of the run.
+    """
+    use_alarm = (
+        timeout
+        and hasattr(signal, "SIGALRM")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_parse_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    started = time.perf_counter()
+    chunks, error = None, None
+    try:
+        chunks = parse_fn(path) if sha256 is None else parse_fn(path, sha256=sha256)
+    except ParseTimeout:
+        error = f"timed out after {timeout:g}s"
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    return chunks, time.perf_counter() - started, error
+
+
+def parse_files(paths, workers=PARSE_WORKERS, timeout=PARSE_TIMEOUT, parse_fn=None, hashes=None):
+    """Parse files on a process pool, yielding (path, chunks, seconds, error) as each finishes
+
+    paths is consumed lazily and at most two files per worker are submitted
+    at a time, so parsed text never runs far ahead of the consumer.
+    With workers=0 files are parsed inline, which is easier to debug.
+    parse_fn (default load_and_split) must be a module-level function so it
+    can be sent to the workers. hashes maps paths to content hashes already
+    computed, which parse_fn then gets as sha256 instead of reading the
+    file again; it is looked up as each file is submitted.
+    """
+    parse_fn = parse_fn or load_and_split
+    hashes = {} if hashes is None else hashes
+    if workers <= 0:
+        for path in paths:
+            yield (path, *parse_file(path, timeout, parse_fn, hashes.get(path)))
+        return
+
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def submit_more():
+            while len(pending) < workers * 2:
+                path = next(paths, None)
+                if path is None:
+                    return
+                future = pool.submit(parse_file, path, timeout, parse_fn, hashes.get(path))
+                pending[future] = path
+
+        submit_more()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    result = (path, *future.result())
+                except Exception as e:
+                    # The worker itself died (e.g. a crash in a native parser)
+                    result = (path, None, 0.0, f"parse worker failed: {e}")
+                submit_more()
+                yield result
+
+
+def chunk_id(rel_path, chunk, ordinal=0):
+    """Content-addressed ID: source path + content hash + ordinal
+
+    The ordinal tells apart identical chunks within one file. The offset is
+    deliberately not part of the key, so text inserted or removed earlier
+    in a file doesn't change the IDs of the unchanged chunks after it; only
+    chunks whose text changed get new IDs and are re-embedded.
+    """
+    content_hash = hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()
+    key = f"{rel_path}\0{content_hash}\0{ordinal}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def chunk_ids(rel_path, chunks):
+    """IDs of a file's chunks; repeats of the same text get ordinals 0, 1, ..."""
+    seen = defaultdict(int)
+    ids = []
+    for chunk in chunks:
+        ordinal = seen[chunk.page_content]
+        seen[chunk.page_content] += 1
+        ids.append(chunk_id(rel_path, chunk, ordinal))
+    return ids
+
+
+def existing_ids(collection, ids):
+    """Subset of ids already stored in the collection (no embeddings fetched)"""
+    found = set()
+    for i in range(0, len(ids), BATCH_SIZE):
+        found.update(collection.get(ids=ids[i:i+BATCH_SIZE], include=[])["ids"])
+    return found
+
+
+def make_embeddings():
+    """The agent's embedding model, behind the shared persistent cache when enabled"""
+    embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+    if not Config.EMBEDDING_CACHE_ENABLED:
+        return embeddings
+    store = EmbeddingStore(
+        Config.EMBEDDING_CACHE_PATH, max_entries=Config.EMBEDDING_CACHE_MAX_ENTRIES
+    )
+    return CachedEmbeddings(embeddings, store, EMBEDDING_MODEL)
 
-    # 3. Create Embeddings
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
 
-    # 4. Store in ChromaDB
+def estimate_tokens(text):
+    """Rough token count for budgeting (~4 bytes of UTF-8 per token)"""
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+class RateLimiter:
+    """Blocking requests-per-minute / tokens-per-minute budget shared by threads"""
+
+    def __init__(self, rpm=EMBED_RPM, tpm=EMBED_TPM, clock=time.monotonic, sleep=time.sleep):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._window = deque()  # (timestamp, tokens) of requests in the last minute
+        self._tokens = 0
+        self.waited_seconds = 0.0
+
+    def acquire(self, tokens=1):
+        """Block until a request of `tokens` fits in the rolling one-minute budget"""
+        while True:
+            with self._lock:
+                now = self._clock()
+                while self._window and now - self._window[0][0] >= 60:
+                    self._tokens -= self._window.popleft()[1]
+
+                fits_requests = not self.rpm or len(self._window) < self.rpm
+                # An oversized request is let through once the window is empty
+                fits_tokens = not self.tpm or not self._window or self._tokens + tokens <= self.tpm
+                if fits_requests and fits_tokens:
+                    self._window.append((now, tokens))
+                    self._tokens += tokens
+                    return
+                delay = self._window[0][0] + 60 - now
+            self.waited_seconds += delay
+            self._sleep(delay)
+
+
+class EmbeddingStage:
+    """Embeds chunks in provider-sized batches and writes them with their vectors
+
+    Chunks from consecutive files are packed into batches of batch_size. Up
+    to `concurrency` batches are embedded at once under the rate limiter,
+    while the calling thread writes finished batches to Chroma in order, so
+    embedding overlaps with the writes of earlier batches. A file's on_done
+    callback fires once its chunks, and all chunks added before them, have
+    been written.
+    """
+
+    def __init__(
+        self,
+        collection,
+        embeddings,
+        limiter=None,
+        batch_size=EMBED_BATCH_SIZE,
+        concurrency=EMBED_CONCURRENCY,
+    ):
+        self.collection = collection
+        self.embeddings = embeddings
+        self.limiter = limiter
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ingest-embed")
+        self._buffer = []  # (id, chunk, file key) not yet in a batch
+        self._in_flight = deque()  # (batch, future) in submission order
+        self._remaining = {}  # file key -> [chunks not yet written, on_done]
+        self._after = defaultdict(list)  # file key -> callbacks to run after it
+        self.batches = 0
+
+    def add(self, key, ids, chunks, on_done):
+        if not ids:
+            # Nothing to write, but the file may use chunks still queued for
+            # an earlier file, so it commits once everything before it has
+            pending = self._buffer[-1][2] if self._buffer else None
+            if pending is None and self._in_flight:
+                pending = self._in_flight[-1][0][-1][2]
+            if pending is None:
+                on_done()
+            else:
+                self._after[pending].append(on_done)
+            return
+        self._remaining[key] = [len(ids), on_done]
+        self._buffer.extend(zip(ids, chunks, repeat(key)))
+        while len(self._buffer) >= self.batch_size:
+            self._submit(self._buffer[:self.batch_size])
+            self._buffer = self._buffer[self.batch_size:]
+
+    def flush(self):
+        """Embed and write everything added so far"""
+        if self._buffer:
+            self._submit(self._buffer)
+            self._buffer = []
+        while self._in_flight:
+            self._write_next()
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, batch):
+        # Backpressure: write finished batches before queueing more work
+        while len(self._in_flight) >= self.concurrency * 2:
+            self._write_next()
+        texts = [chunk.page_content for _, chunk, _ in batch]
+        self._in_flight.append((batch, self._pool.submit(self._embed, texts)))
+
+    def _embed(self, texts):
+        tokens = sum(estimate_tokens(text) for text in texts)
+        for attempt in range(EMBED_RETRIES):
+            if self.limiter:
+                self.limiter.acquire(tokens)
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if attempt == EMBED_RETRIES - 1:
+                    raise
+                delay = EMBED_RETRY_DELAY * (2 ** attempt)
+                print(f"Embedding batch failed ({e}), retrying in {delay:.0f}s")
+                time.sleep(delay)
+
+    def _write_next(self):
+        batch, future = self._in_flight.popleft()
+        vectors = future.result()
+        self.collection.upsert(
+            ids=[id_ for id_, _, _ in batch],
+            documents=[chunk.page_content for _, chunk, _ in batch],
+            metadatas=[chunk.metadata for _, chunk, _ in batch],
+            embeddings=vectors
+        )
+        self.batches += 1
+        for _, _, key in batch:
+            remaining = self._remaining[key]
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                del self._remaining[key]
+                remaining[1]()
+                for on_done in self._after.pop(key, []):
+                    on_done()
+
+
+class ChunkReferences:
+    """Which files use each stored chunk, with near-duplicate lookup over them
+
+    With deduplication one stored chunk stands for near-identical chunks of
+    several files, so a chunk is only deleted once no file uses it. A file
+    claims its chunks when they are resolved rather than when it commits,
+    so a chunk that its own file is about to replace stays alive for any
+    file that matched it in the meantime.
+    """
+
+    def __init__(self, manifest, max_distance=None):
+        self.files = defaultdict(set)  # chunk ID -> rel paths using it
+        self.index = SimHashIndex(max_distance) if max_distance is not None else None
+        self.changed = set()  # chunks whose list of files changed
+        for rel_path, entry in manifest.items():
+            for id_ in entry["chunk_ids"]:
+                self.files[id_].add(rel_path)
+            if self.index is not None:
+                for id_, fingerprint in entry.get("fingerprints", {}).items():
+                    self.index.add(id_, fingerprint)
+
+    def resolve(self, rel_path, entry, ids, chunks, stored):
+        """Map each chunk to the stored chunk that represents it
+
+        Returns (target IDs, fingerprints of the targets). A chunk is its
+        own target unless it is new and a near-duplicate of a chunk some
+        file keeps; chunks only this file's previous version uses are never
+        matched, since they are about to be replaced.
+        """
+        replaced = set()
+        if entry:
+            replaced = {id_ for id_ in entry["chunk_ids"] if self.files[id_] == {rel_path}}
+        targets, fingerprints = [], {}
+        for id_, chunk in zip(ids, chunks):
+            target = id_
+            if self.index is not None:
+                fingerprint = simhash(chunk.page_content)
+                if id_ not in stored:
+                    target = self.index.find(fingerprint, exclude=replaced) or id_
+                if target == id_:
+                    self.index.add(id_, fingerprint)
+                fingerprints[target] = self.index.fingerprints[target]
+            if rel_path not in self.files[target]:
+                if self.files[target]:
+                    self.changed.add(target)
+                self.files[target].add(rel_path)
+            targets.append(target)
+        return targets, fingerprints
+
+    def release(self, rel_path, ids):
+        """Drop a file's use of chunks; returns those no file uses anymore"""
+        orphaned = []
+        for id_ in ids:
+            files = self.files.get(id_)
+            if files is None:
+                continue
+            files.discard(rel_path)
+            if files:
+                self.changed.add(id_)
+                continue
+            del self.files[id_]
+            if self.index is not None:
+                self.index.remove(id_)
+            orphaned.append(id_)
+        return orphaned
+
+    def update_sources(self, collection, source_dir):
+        """Point shared chunks at every file they came from"""
+        ids = sorted(id_ for id_ in self.changed if id_ in self.files)
+        for i in range(0, len(ids), BATCH_SIZE):
+            batch = ids[i:i + BATCH_SIZE]
+            metadatas = []
+            for id_ in batch:
+                paths = [os.path.join(source_dir, p) for p in sorted(self.files[id_])]
+                metadatas.append({"source": paths[0], "sources": "\n".join(paths)})
+            collection.update(ids=batch, metadatas=metadatas)
+        self.changed.clear()
+
+
+def in_scope(rel_path, scope):
+    """Whether rel_path is scope itself or lies under it"""
+    return scope == os.curdir or rel_path == scope or rel_path.startswith(scope + os.sep)
+
+
+def count_pdf_pages(pages):
+    """Tally a PDF's pages by extraction, from TextFirstPDFLoader's page documents
+
+    Returns {"pdf_pages_<extraction>": pages, ..., "pdf_ocr_seconds": seconds};
+    every page not read from the text layer went through OCR.
+    """
+    counts = {f"pdf_pages_{extraction}": 0 for extraction in PDF_EXTRACTIONS}
+    counts["pdf_ocr_seconds"] = 0.0
+    for page in pages:
+        extraction = page.metadata.get("extraction")
+        if extraction not in PDF_EXTRACTIONS:
+            continue
+        counts[f"pdf_pages_{extraction}"] += 1
+        if extraction != "text_layer":
+            counts["pdf_ocr_seconds"] += page.metadata.get("extraction_seconds", 0.0)
+    return counts if any(counts.values()) else {}
+
+
+def sync_files(
+    collection,
+    manifest,
+    source_dir=SOURCE_DIRECTORY,
+    workers=PARSE_WORKERS,
+    timeout=PARSE_TIMEOUT,
+    embeddings=None,
+    limiter=None,
+    checkpoint=None,
+    paths=None,
+):
+    """Bring the collection in line with source_dir, updating the manifest in place
+
+    Runs as a streaming pipeline: discovery, parsing, embedding and writing
+    overlap and are connected by bounded queues, so only a few files' text
+    is in memory at any time. Files whose size and mtime match the manifest are skipped
+    without being read; otherwise the content hash decides. New or changed
+    files are re-parsed on the process pool; only chunks with new IDs are
+    embedded and written, and IDs that disappeared are deleted once the
+    file's new chunks are in. Chunks of files that no longer exist are
+    deleted. Each file's parse time is kept in its manifest entry, and a
+    checkpoint, if given, is told about every committed file.
+
+    `paths` limits the run to those files and directories under source_dir
+    (e.g. the ones a watcher saw change); only manifest entries under them
+    can be deleted.
+    """
+    if embeddings is None:
+        embeddings = make_embeddings()
+
+    stats = {
+        "added": 0,
+        "updated": 0,
+        "skipped": 0,
+        "deleted": 0,
+        "failed": 0,
+        "chunks_written": 0,
+        "chunks_unchanged": 0,
+        "chunks_deduplicated": 0,
+        "parse_seconds": 0.0,
+        "pdf_pages_text_layer": 0,
+        "pdf_pages_ocr": 0,
+        "pdf_pages_ocr_failed": 0,
+        "pdf_pages_empty": 0,
+        "pdf_ocr_seconds": 0.0,
+        "parse_cache_hits": 0,
+    }
+    seen = set()
+    # Files between discovery and writing; bounded by the queues and pool
+    planned = {}
+    # Their content hashes, so the parse cache lookup needn't hash them again
+    hashes = {}
+    formats = FormatStats()
+    refs = ChunkReferences(manifest, DEDUP_DISTANCE if DEDUP_ENABLED else None)
+
+    def candidates():
+        if paths is None:
+            yield from discover_files(source_dir)
+            return
+        for path in sorted(set(paths)):
+            if os.path.isdir(path):
+                yield from discover_files(path)
+            elif "." in os.path.basename(path) and os.path.isfile(path):
+                yield path
+
+    def discover():
+        for path in candidates():
+            rel_path = os.path.relpath(path, source_dir)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Removed since it was listed; handled as a deletion
+                continue
+            seen.add(rel_path)
+            entry = manifest.get(rel_path)
+
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                stats["skipped"] += 1
+                continue
+
+            try:
+                sha256 = hash_file(path)
+            except FileNotFoundError:
+                seen.discard(rel_path)
+                continue
+            if entry and entry["sha256"] == sha256:
+                # Touched but not changed
+                entry.update(mtime=stat.st_mtime, size=stat.st_size)
+                stats["skipped"] += 1
+                continue
+
+            planned[path] = (rel_path, sha256, stat, entry)
+            hashes[path] = sha256
+            yield path
+
+    parsed = bounded_stage(
+        parse_files(
+            bounded_stage(discover(), name="discover"), workers, timeout, hashes=hashes
+        ),
+        name="parse",
+    )
+
+    def commit(rel_path, sha256, stat, entry, ids, fingerprints, written, seconds):
+        """Record a file once all of its new chunks are in the collection"""
+        stale = sorted(set(entry["chunk_ids"]) - set(ids)) if entry else []
+        orphaned = refs.release(rel_path, stale)
+        if orphaned:
+            collection.delete(ids=orphaned)
+
+        manifest[rel_path] = {
+            "sha256": sha256,
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "chunk_ids": sorted(set(ids)),
+            "parse_seconds": round(seconds, 3),
+        }
+        if fingerprints:
+            manifest[rel_path]["fingerprints"] = fingerprints
+        stats["updated" if entry else "added"] += 1
+        print(
+            f"{'Updated' if entry else 'Added'} {rel_path} "
+            f"({written} of {len(set(ids))} chunks written, parsed in {seconds:.1f}s)"
+        )
+        if checkpoint:
+            checkpoint.committed(stage.batches)
+
+    stage = EmbeddingStage(collection, embeddings, limiter, EMBED_BATCH_SIZE, EMBED_CONCURRENCY)
+    slowest = []
+    try:
+        for path, chunks, seconds, error in parsed:
+            rel_path, sha256, stat, entry = planned.pop(path)
+            del hashes[path]
+            stats["parse_seconds"] += seconds
+            formats.record(
+                format_name(detect_mime_type(path)),
+                stat.st_size,
+                seconds,
+                len(chunks or ()),
+                failed=bool(error),
+            )
+            heapq.heappush(slowest, (seconds, rel_path))
+            if len(slowest) > 5:
+                heapq.heappop(slowest)
+            if error:
+                print(f"Failed to parse {rel_path} after {seconds:.1f}s: {error}")
+                stats["failed"] += 1
+                continue
+            if getattr(chunks, "cached", False):
+                stats["parse_cache_hits"] += 1
+            for key, value in getattr(chunks, "pdf_pages", {}).items():
+                stats[key] += value
+
+            # Only chunks the collection doesn't hold yet are embedded;
+            # identical text in the same file is the same chunk, and
+            # near-duplicates of a kept chunk are represented by it
+            ids = chunk_ids(rel_path, chunks)
+            stored = existing_ids(collection, ids)
+            targets, fingerprints = refs.resolve(rel_path, entry, ids, chunks, stored)
+            new_chunks = {}
+            for id_, target, chunk in zip(ids, targets, chunks):
+                if target == id_ and id_ not in stored:
+                    new_chunks.setdefault(id_, chunk)
+            deduplicated = sum(1 for id_, target in zip(ids, targets) if target != id_)
+            stats["chunks_written"] += len(new_chunks)
+            stats["chunks_deduplicated"] += deduplicated
+            stats["chunks_unchanged"] += len(ids) - len(new_chunks) - deduplicated
+
+            stage.add(
+                rel_path,
+                list(new_chunks),
+                list(new_chunks.values()),
+                functools.partial(
+                    commit,
+                    rel_path,
+                    sha256,
+                    stat,
+                    entry,
+                    targets,
+                    fingerprints,
+                    len(new_chunks),
+                    seconds,
+                ),
+            )
+        stage.flush()
+    finally:
+        stage.close()
+    stats["embed_batches"] = stage.batches
+    stats["formats"] = formats.summary()
+
+    if slowest:
+        slowest = ", ".join(f"{name} {secs:.1f}s" for secs, name in sorted(slowest, reverse=True))
+        print(f"Slowest files to parse: {slowest}")
+
+    gone = set(manifest) - seen
+    if paths is not None:
+        scopes = [os.path.relpath(path, source_dir) for path in paths]
+        gone = {
+            rel_path
+            for rel_path in gone
+            if any(in_scope(rel_path, scope) for scope in scopes)
+            and not os.path.exists(os.path.join(source_dir, rel_path))
+        }
+    for rel_path in sorted(gone):
+        ids = manifest.pop(rel_path)["chunk_ids"]
+        orphaned = refs.release(rel_path, ids)
+        if orphaned:
+            collection.delete(ids=orphaned)
+        stats["deleted"] += 1
+        print(f"Deleted {rel_path} ({len(ids)} chunks)")
+        if checkpoint:
+            checkpoint.committed(stage.batches)
+
+    refs.update_sources(collection, source_dir)
+    return stats
+
+
+def validate_collection(collection, manifest, embeddings, previous_count=0):
+    """Checks a freshly built version must pass before it goes live; returns problems
+
+    The chunk count must match the manifest and not collapse compared to
+    the live version (e.g. a half-mounted share), and sampled chunks must
+    come back as top results when their own text is used as the query.
+    """
+    problems = []
+    count = collection.count()
+    # Files share chunks that were deduplicated across them
+    expected = len({id_ for entry in manifest.values() for id_ in entry["chunk_ids"]})
+    if count == 0:
+        problems.append("collection is empty")
+    if count != expected:
+        problems.append(f"holds {count} chunks but the manifest lists {expected}")
+    if previous_count and count < previous_count * MIN_CHUNK_RATIO:
+        problems.append(
+            f"holds {count} chunks, under {MIN_CHUNK_RATIO:.0%} of the live "
+            f"version's {previous_count}"
+        )
+    if problems:
+        return problems
+
+    sample = collection.get(limit=VALIDATION_SAMPLES, include=["documents"])
+    found = 0
+    for id_, text in zip(sample["ids"], sample["documents"]):
+        result = collection.query(
+            query_embeddings=[embeddings.embed_query(text)], n_results=5, include=[]
+        )
+        found += id_ in result["ids"][0]
+    if found * 2 < len(sample["ids"]):
+        problems.append(
+            f"only {found} of {len(sample['ids'])} sample queries found their own chunk"
+        )
+    return problems
+
+
+def print_summary(stats, limiter, embeddings):
+    print(
+        f"Files added: {stats['added']}, updated: {stats['updated']}, "
+        f"skipped: {stats['skipped']}, deleted: {stats['deleted']}, "
+        f"failed: {stats['failed']}"
+    )
+    print(
+        f"Chunks written: {stats['chunks_written']}, "
+        f"unchanged: {stats['chunks_unchanged']}, "
+        f"total parse time: {stats['parse_seconds']:.1f}s"
+    )
+    if stats.get("formats"):
+        print("Parse time by format:")
+        for row in stats["formats"]:
+            print(
+                f"  {row['format']:>10}: {row['files']} files ({row['failed']} failed), "
+                f"{row['bytes'] / 1e6:.1f} MB in {row['seconds']:.1f}s, "
+                f"{row['mb_per_second']:.2f} MB/s, {row['share']:.0%} of parse time"
+            )
+    if stats["chunks_deduplicated"]:
+        total = stats["chunks_written"] + stats["chunks_unchanged"] + stats["chunks_deduplicated"]
+        print(
+            f"Near-duplicate chunks collapsed: {stats['chunks_deduplicated']} of {total} "
+            f"({stats['chunks_deduplicated'] / total:.0%} fewer chunks)"
+        )
+    print(
+        f"Embedding batches: {stats['embed_batches']}, "
+        f"rate-limit wait: {limiter.waited_seconds:.1f}s"
+    )
+    pdf_pages = {extraction: stats[f"pdf_pages_{extraction}"] for extraction in PDF_EXTRACTIONS}
+    if any(pdf_pages.values()):
+        ocr_pages = pdf_pages["ocr"] + pdf_pages["ocr_failed"] + pdf_pages["empty"]
+        per_page = stats["pdf_ocr_seconds"] / ocr_pages if ocr_pages else 0.0
+        print(
+            f"PDF pages: {pdf_pages['text_layer']} from the text layer, "
+            f"{ocr_pages} sent to OCR in {stats['pdf_ocr_seconds']:.1f}s "
+            f"({pdf_pages['ocr']} read, {pdf_pages['ocr_failed']} failed, "
+            f"{pdf_pages['empty']} blank; "
+            f"~{per_page * pdf_pages['text_layer']:.0f}s of OCR avoided)"
+        )
+    if stats["parse_cache_hits"]:
+        print(
+            f"Parse cache: {stats['parse_cache_hits']} files read from the cache, "
+            "not included in the PDF page counts"
+        )
+    if isinstance(embeddings, CachedEmbeddings):
+        cache = embeddings.store.stats()
+        print(
+            f"Embedding cache: {cache['hits']} hits, {cache['misses']} misses "
+            f"({cache['hit_rate']:.0%}), {cache['entries']} entries"
+        )
+
+
+def stamp(collection, **metadata):
+    """Record ingestion metadata; a new ingested_at tells agents to drop cached answers"""
+    collection.modify(
+        metadata={
+            **(collection.metadata or {}),
+            "ingested_at": datetime.now().isoformat(),
+            "embedding_model": EMBEDDING_MODEL,
+            **metadata,
+        }
+    )
+
+
+def build_new_version(
+    client,
+    embeddings,
+    limiter,
+    workers,
+    timeout,
+    source_dir=SOURCE_DIRECTORY,
+    checkpoint=None,
+):
+    """Blue/green rebuild: ingest into a new version, validate it, then switch the alias
+
+    The live collection keeps serving until the switch. A version that
+    fails validation is deleted and the alias is left untouched. An
+    interrupted build keeps its version and checkpoint; passing that
+    checkpoint back continues the same version instead of starting over.
+    """
+    live_name = resolve_collection(client, COLLECTION_NAME)
+    live_names = {c.name for c in client.list_collections()}
+    previous_count = client.get_collection(live_name).count() if live_name in live_names else 0
+
+    versions = list_versions(client, COLLECTION_NAME)
+    unfinished = {name: version for version, name in versions if name != live_name}
+    if checkpoint and checkpoint.collection in unfinished:
+        name = checkpoint.collection
+        version = unfinished[name]
+        collection = client.get_collection(name)
+        print(
+            f"Resuming build of {name}: {len(checkpoint.manifest)} files and "
+            f"{checkpoint.batches} batches already committed"
+        )
+    else:
+        if checkpoint:
+            print(f"Checkpointed build {checkpoint.collection} is gone, starting over")
+        version = (versions[-1][0] if versions else 0) + 1
+        name = version_name(COLLECTION_NAME, version)
+        print(f"Building {name} while {live_name} stays live")
+        collection = client.create_collection(name=name)
+        checkpoint = Checkpoint(CHECKPOINT_PATH, "full", name, {})
+        checkpoint.save()
+
+    manifest = checkpoint.manifest
+    try:
+        stats = sync_files(
+            collection,
+            manifest,
+            source_dir,
+            workers=workers,
+            timeout=timeout,
+            embeddings=embeddings,
+            limiter=limiter,
+            checkpoint=checkpoint,
+        )
+        problems = validate_collection(collection, manifest, embeddings, previous_count)
+    except BaseException:
+        # Keep the partial version; --resume continues from the checkpoint
+        checkpoint.save()
+        print(f"Build of {name} interrupted, run with --resume to continue it")
+        raise
+
+    checkpoint.clear()
+    if problems:
+        client.delete_collection(name=name)
+        print(f"Validation of {name} failed, keeping {live_name} live:")
+        for problem in problems:
+            print(f"  - {problem}")
+        stats["switched"] = False
+        return stats
+
+    stamp(collection, version=version)
+    # The manifest must exist before anyone can follow the alias to it
+    save_manifest(manifest, manifest_path(name))
+    switch_alias(client, COLLECTION_NAME, name)
+    print(f"Switched {COLLECTION_NAME} to {name}")
+
+    for old in garbage_collect(client, COLLECTION_NAME, keep=KEEP_VERSIONS):
+        if os.path.exists(manifest_path(old)):
+            os.remove(manifest_path(old))
+        print(f"Deleted old collection: {old}")
+    stats["switched"] = True
+    return stats
+
+
+def discard_checkpoint(client, checkpoint):
+    """Drop an unfinished run that is not being resumed, with its partial version"""
+    live_name = resolve_collection(client, COLLECTION_NAME)
+    if checkpoint.mode == "full" and checkpoint.collection != live_name:
+        if checkpoint.collection in {c.name for c in client.list_collections()}:
+            client.delete_collection(name=checkpoint.collection)
+            print(f"Discarded unfinished build {checkpoint.collection} (use --resume to continue one)")
+    checkpoint.clear()
+
+
+def main(incremental=False, workers=PARSE_WORKERS, timeout=PARSE_TIMEOUT, resume=False):
+    embeddings = make_embeddings()
+    limiter = RateLimiter(EMBED_RPM, EMBED_TPM)
+
     client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
-    
-    # Ensure collection exists
-    if COLLECTION_NAME in [c.name for c in client.list_collections()]:
-        print(f"Deleting existing collection: {COLLECTION_NAME}")
-        client.delete_collection(name=COLLECTION_NAME)
-
-    print(f"Creating new collection: {COLLECTION_NAME}")
-    collection = client.create_collection(name=COLLECTION_NAME)
-
-    # Add documents in batches
-    batch_size = 100
-    for i in range(0, len(splits), batch_size):
-        batch_splits = splits[i:i+batch_size]
-        batch_texts = [split.page_content for split in batch_splits]
-        batch_metadatas = [split.metadata for split in batch_splits]
-        batch_ids = [f"doc_{i+j}" for j in range(len(batch_splits))]
-
-        collection.add(
-            documents=batch_texts,
-            metadatas=batch_metadatas,
-            ids=batch_ids
+
+    checkpoint = Checkpoint.load(CHECKPOINT_PATH)
+    if checkpoint and not resume:
+        discard_checkpoint(client, checkpoint)
+        checkpoint = None
+    elif resume and not checkpoint:
+        print("No checkpoint found, starting a new run")
+    elif resume:
+        # Finish the interrupted run in the mode it was started in
+        incremental = checkpoint.mode == "incremental"
+
+    print(f"Starting {'incremental ' if incremental else ''}ingestion from: {SOURCE_DIRECTORY}")
+
+    if incremental:
+        # Incremental runs update the live version in place
+        collection = client.get_or_create_collection(
+            name=resolve_collection(client, COLLECTION_NAME)
+        )
+        stored_model = (collection.metadata or {}).get("embedding_model")
+        if collection.count() and stored_model != EMBEDDING_MODEL:
+            # Vectors from another model can't be mixed into this collection
+            print(f"Collection was embedded with {stored_model or 'the default model'}, rebuilding")
+            incremental = False
+
+    if incremental:
+        if checkpoint and checkpoint.mode == "incremental" and checkpoint.collection == collection.name:
+            print(f"Resuming incremental run: {checkpoint.batches} batches already committed")
+        else:
+            checkpoint = Checkpoint(
+                CHECKPOINT_PATH,
+                "incremental",
+                collection.name,
+                load_collection_manifest(collection.name),
+            )
+        manifest = checkpoint.manifest
+        try:
+            stats = sync_files(
+                collection,
+                manifest,
+                workers=workers,
+                timeout=timeout,
+                embeddings=embeddings,
+                limiter=limiter,
+                checkpoint=checkpoint,
+            )
+        finally:
+            # Entries are only updated after their chunks are written, so the
+            # manifest stays consistent with the collection even after a
+            # failure; the checkpoint only matters if this never runs
+            save_manifest(manifest, manifest_path(collection.name))
+            checkpoint.clear()
+
+        if stats["added"] or stats["updated"] or stats["deleted"]:
+            stamp(collection)
+    else:
+        if checkpoint and checkpoint.mode != "full":
+            checkpoint.clear()
+            checkpoint = None
+        stats = build_new_version(
+            client, embeddings, limiter, workers, timeout, checkpoint=checkpoint
         )
-        print(f"Added batch {i//batch_size + 1} to ChromaDB.")
 
+    print_summary(stats, limiter, embeddings)
     print("--- Ingestion Complete ---")
+    return stats
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Ingest documents into ChromaDB")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-ingest new or changed files and delete removed ones",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=PARSE_WORKERS,
+        help="parse worker processes (0 parses inline)",
+    )
+    parser.add_argument(
+        "--parse-timeout",
+        type=float,
+        default=PARSE_TIMEOUT,
+        help="seconds before a single file's parse is abandoned",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted run from its last checkpoint",
+    )
+    parser.add_argument(
+        "--prune-parse-cache",
+        action="store_true",
+        help="delete cached parses not needed by the live manifest, then exit",
+    )
+    args = parser.parse_args()
+    if args.prune_parse_cache:
+        prune_parse_cache()
+        sys.exit(0)
+    stats = main(
+        incremental=args.incremental,
+        workers=args.workers,
+        timeout=args.parse_timeout,
+        resume=args.resume,
+    )
+    if stats.get("switched") is False:
+        sys.exit(1)
@@ -0,0 +1,255 @@
+"""
+Watch the document share and keep the live collection in sync with it.
+
+Usage: python scripts/watch_ingest.py [--poll] [--debounce 5] [--max-wait 60]
+
+File changes are detected with inotify where the filesystem delivers events,
+and by polling (mtime, size) snapshots where it doesn't: bind mounts from a
+Windows host and network shares usually don't, so use --poll there. Changes
+are debounced per file, so a file being copied is ingested once, and then
+fed in batches through the same parse / chunk / embed / upsert pipeline as
+`ingest.py --incremental`, into whichever collection the alias points at.
+A full incremental sync runs at startup, every --rescan seconds as a safety
+net for missed events, and whenever a rebuild switches the alias.
+
+Metrics are served on WATCH_METRICS_PORT: files waiting, the age of the
+oldest pending change, and the lag from a change to its chunks being
+searchable. Don't run `ingest.py --incremental` while the watcher is up;
+both write the live version's manifest.
+"""
+import os
+import time
+import signal
+import argparse
+import threading
+
+import chromadb
+from prometheus_client import start_http_server
+
+from ingest import (
+    CHROMA_HOST,
+    CHROMA_PORT,
+    COLLECTION_NAME,
+    EMBEDDING_MODEL,
+    EMBED_RPM,
+    EMBED_TPM,
+    PARSE_TIMEOUT,
+    PARSE_WORKERS,
+    SOURCE_DIRECTORY,
+    RateLimiter,
+    discover_files,
+    load_collection_manifest,
+    manifest_path,
+    make_embeddings,
+    resolve_collection,
+    save_manifest,
+    stamp,
+    sync_files,
+)
+from app import metrics
+from app.file_watcher import ChangeBatcher, PollingScanner, start_inotify
+
+DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "5"))
+MAX_WAIT_SECONDS = float(os.getenv("WATCH_MAX_WAIT_SECONDS", "60"))
+BATCH_FILES = int(os.getenv("WATCH_BATCH_FILES", "200"))
+POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "10"))
+RESCAN_INTERVAL = float(os.getenv("WATCH_RESCAN_INTERVAL", "900"))
+RETRY_DELAY = float(os.getenv("WATCH_RETRY_DELAY", "30"))
+METRICS_PORT = int(os.getenv("WATCH_METRICS_PORT", "9108"))
+# Idle loop period; bounds how late a debounced batch is picked up
+TICK = 0.5
+
+
+class Watcher:
+    """Ingests batches of changed paths into the collection behind the alias"""
+
+    def __init__(self, client, embeddings, limiter, source_dir=SOURCE_DIRECTORY,
+                 workers=PARSE_WORKERS, timeout=PARSE_TIMEOUT, batcher=None):
+        self.client = client
+        self.embeddings = embeddings
+        self.limiter = limiter
+        self.source_dir = source_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.batcher = batcher or ChangeBatcher(DEBOUNCE_SECONDS, MAX_WAIT_SECONDS)
+        self.collection = None
+        self.manifest = None
+        # Paths being ingested right now, with when each change was first seen
+        self.in_progress = {}
+
+    def live(self):
+        """The live collection and its manifest; True if the alias moved since last time"""
+        name = resolve_collection(self.client, COLLECTION_NAME)
+        if self.collection is not None and self.collection.name == name:
+            return False
+        if self.collection is not None:
+            print(f"Alias now points at {name}, following it")
+        self.collection = self.client.get_or_create_collection(name=name)
+        stored_model = (self.collection.metadata or {}).get("embedding_model")
+        if self.collection.count() and stored_model != EMBEDDING_MODEL:
+            raise SystemExit(
+                f"{name} was embedded with {stored_model or 'the default model'}, "
+                "run a full ingest.py rebuild first"
+            )
+        # Each version has its own manifest, which a rebuild saves before
+        # switching the alias, so this is the new version's, not the old one's
+        self.manifest = load_collection_manifest(name)
+        return True
+
+    def sync(self, paths=None, first_seen=None):
+        """Sync the given paths, or the whole tree, and record metrics"""
+        try:
+            stats = sync_files(
+                self.collection,
+                self.manifest,
+                self.source_dir,
+                workers=self.workers,
+                timeout=self.timeout,
+                embeddings=self.embeddings,
+                limiter=self.limiter,
+                paths=paths,
+            )
+        finally:
+            save_manifest(self.manifest, manifest_path(self.collection.name))
+        if stats["added"] or stats["updated"] or stats["deleted"]:
+            stamp(self.collection)
+
+        now = time.monotonic()
+        for seen in (first_seen or {}).values():
+            metrics.INGEST_LAG.observe(now - seen)
+        for result in ("added", "updated", "deleted", "skipped", "failed"):
+            metrics.INGEST_FILES.labels(result=result).inc(stats[result])
+        return stats
+
+    def full_sync(self, reason):
+        print(f"Full sync ({reason})")
+        try:
+            self.live()
+            stats = self.sync()
+        except SystemExit:
+            raise
+        except Exception as e:
+            print(f"Full sync failed: {e}")
+            return False
+        print(
+            f"Full sync done: {stats['added']} added, {stats['updated']} updated, "
+            f"{stats['deleted']} deleted, {stats['failed']} failed"
+        )
+        return True
+
+    def ingest_ready(self):
+        """Ingest one batch of debounced changes; False if nothing was ready"""
+        batch = self.batcher.take(BATCH_FILES)
+        if not batch:
+            return False
+        self.in_progress = batch
+        self.update_backlog()
+        started = time.monotonic()
+        try:
+            if self.live():
+                # A rebuild may have missed changes made while it ran
+                self.sync()
+            stats = self.sync(list(batch), first_seen=batch)
+        except SystemExit:
+            raise
+        except Exception as e:
+            print(f"Ingesting {len(batch)} changed paths failed ({e}), retrying in {RETRY_DELAY:.0f}s")
+            for path, seen in batch.items():
+                self.batcher.add(path, first_seen=seen)
+            raise
+        finally:
+            self.in_progress = {}
+            self.update_backlog()
+        print(
+            f"{len(batch)} changed paths in {time.monotonic() - started:.1f}s: "
+            f"{stats['added']} added, {stats['updated']} updated, "
+            f"{stats['deleted']} deleted, {stats['failed']} failed"
+        )
+        return True
+
+    def update_backlog(self):
+        pending, oldest = self.batcher.backlog()
+        if self.in_progress:
+            oldest = max(oldest, time.monotonic() - min(self.in_progress.values()))
+        metrics.INGEST_BACKLOG.set(pending + len(self.in_progress))
+        metrics.INGEST_OLDEST_PENDING.set(oldest)
+
+
+def run(watcher, stop, poll=False):
+    source_dir = watcher.source_dir
+    # Start watching before the catch-up sync so nothing changed during it is missed
+    observer = None if poll else start_inotify(source_dir, watcher.batcher.add)
+    scanner = None
+    if observer is None:
+        scanner = PollingScanner(lambda: discover_files(source_dir))
+        print(f"Polling {source_dir} every {POLL_INTERVAL:.0f}s")
+    else:
+        print(f"Watching {source_dir} with inotify")
+
+    watcher.full_sync("startup")
+    next_poll = time.monotonic() + POLL_INTERVAL
+    next_rescan = time.monotonic() + RESCAN_INTERVAL
+    try:
+        while not stop.is_set():
+            now = time.monotonic()
+            if scanner is not None and now >= next_poll:
+                for path in scanner.changes():
+                    watcher.batcher.add(path)
+                next_poll = now + POLL_INTERVAL
+            if now >= next_rescan:
+                watcher.full_sync("periodic rescan")
+                next_rescan = now + RESCAN_INTERVAL
+
+            try:
+                busy = watcher.ingest_ready()
+            except SystemExit:
+                raise
+            except Exception:
+                stop.wait(RETRY_DELAY)
+                continue
+            if not busy:
+                watcher.update_backlog()
+                stop.wait(TICK)
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+
+def main(poll=False, workers=PARSE_WORKERS, timeout=PARSE_TIMEOUT):
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    start_http_server(METRICS_PORT, registry=metrics.metrics_registry())
+    print(f"Serving watcher metrics on :{METRICS_PORT}")
+
+    client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+    watcher = Watcher(
+        client,
+        make_embeddings(),
+        RateLimiter(EMBED_RPM, EMBED_TPM),
+        workers=workers,
+        timeout=timeout,
+    )
+    run(watcher, stop, poll=poll)
+    print("--- Watcher stopped ---")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Continuously ingest changed documents")
+    parser.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                        help="seconds a file must be quiet before it is ingested")
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT_SECONDS,
+                        help="ingest a file that keeps changing after this many seconds")
+    parser.add_argument("--rescan", type=float, default=RESCAN_INTERVAL,
+                        help="seconds between full syncs that catch missed events")
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS,
+                        help="parse worker processes (0 parses inline)")
+    parser.add_argument("--parse-timeout", type=float, default=PARSE_TIMEOUT,
+                        help="seconds before a single file's parse is abandoned")
+    args = parser.parse_args()
+
+    DEBOUNCE_SECONDS, MAX_WAIT_SECONDS, RESCAN_INTERVAL = args.debounce, args.max_wait, args.rescan
+    main(poll=args.poll, workers=args.workers, timeout=args.parse_timeout)
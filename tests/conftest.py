@@ -1,6 +1,10 @@
+import os
 import pytest
 from unittest.mock import MagicMock
 
+# Keep the persistent embedding cache out of the working tree during tests
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+
 
 @pytest.fixture(autouse=True)
 def prevent_slack_api_calls(monkeypatch):
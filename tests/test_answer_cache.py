@@ -0,0 +1,184 @@
+"""
+Tests for the semantic answer cache
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.answer_cache import SemanticAnswerCache
+from app.core_agent import CoreAgent, Config, TaskStatus
+
+
+class TestSemanticAnswerCache:
+    """Test suite for SemanticAnswerCache"""
+
+    def test_hit_above_threshold(self):
+        """Similar embeddings should return the cached result"""
+        cache = SemanticAnswerCache(similarity_threshold=0.9)
+        cache.store("q1", [1.0, 0.0, 0.0], {"generation": "a1"})
+
+        result, similarity = cache.lookup([0.99, 0.05, 0.0])
+
+        assert result["generation"] == "a1"
+        assert similarity > 0.9
+        assert cache.stats()["hits"] == 1
+
+    def test_miss_below_threshold(self):
+        """Dissimilar embeddings should miss"""
+        cache = SemanticAnswerCache(similarity_threshold=0.9)
+        cache.store("q1", [1.0, 0.0, 0.0], {"generation": "a1"})
+
+        assert cache.lookup([0.0, 1.0, 0.0]) is None
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted when full"""
+        cache = SemanticAnswerCache(max_size=2, similarity_threshold=0.99)
+        cache.store("q1", [1.0, 0.0, 0.0], {"generation": "a1"})
+        cache.store("q2", [0.0, 1.0, 0.0], {"generation": "a2"})
+
+        # Touch q1 so q2 becomes least recently used
+        cache.lookup([1.0, 0.0, 0.0])
+        cache.store("q3", [0.0, 0.0, 1.0], {"generation": "a3"})
+
+        assert len(cache) == 2
+        assert cache.lookup([0.0, 1.0, 0.0]) is None
+        assert cache.lookup([1.0, 0.0, 0.0])[0]["generation"] == "a1"
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """Entries older than the TTL are not returned"""
+        cache = SemanticAnswerCache(ttl_seconds=10)
+        with patch("app.answer_cache.time.monotonic", return_value=100.0):
+            cache.store("q1", [1.0, 0.0], {"generation": "a1"})
+        with patch("app.answer_cache.time.monotonic", return_value=111.0):
+            assert cache.lookup([1.0, 0.0]) is None
+        assert len(cache) == 0
+
+    def test_invalidate(self):
+        """Invalidation drops every entry"""
+        cache = SemanticAnswerCache()
+        cache.store("q1", [1.0, 0.0], {"generation": "a1"})
+
+        cache.invalidate()
+
+        assert len(cache) == 0
+        assert cache.stats()["invalidations"] == 1
+
+
+class TestCoreAgentAnswerCache:
+    """Test the answer cache integration in CoreAgent"""
+
+    @pytest.fixture
+    @patch("app.core_agent.GoogleGenerativeAIEmbeddings")
+    @patch("app.core_agent.chromadb.HttpClient")
+    @patch("app.core_agent.Chroma")
+    @patch("app.core_agent.ChatOllama")
+    @patch("app.core_agent.TavilySearchResults")
+    def mock_agent(
+        self, mock_tavily, mock_ollama, mock_chroma, mock_http_client, mock_embeddings
+    ):
+        config = Config()
+        config.ANSWER_CACHE_ENABLED = True
+        config.ANSWER_CACHE_THRESHOLD = 0.9
+        agent = CoreAgent(config)
+        agent.embeddings.aembed_query = AsyncMock(return_value=[1.0, 0.0, 0.0])
+        return agent
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_graph(self, mock_agent):
+        """A cached answer is returned without running the graph"""
+        mock_agent.answer_cache.store(
+            "old question",
+            [1.0, 0.0, 0.0],
+            {"generation": "cached", "source": "vectorstore", "documents": ["d"]},
+        )
+        mock_agent.graph = MagicMock()
+
+        result = await mock_agent.process_question("new question")
+
+        assert result["generation"] == "cached"
+        assert result["documents"] == ["d"]
+        assert result["status"] == TaskStatus.COMPLETED
+        assert result["progress"]["step"] == "cache_hit"
+        mock_agent.graph.astream.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_completed_answer_is_cached(self, mock_agent):
+        """A cleanly completed graph run populates the cache"""
+
+        async def fake_astream(state, **kwargs):
+            yield "updates", {"save_knowledge": {}}
+            yield "values", {
+                **state,
+                "generation": "fresh",
+                "source": "vectorstore",
+                "status": TaskStatus.COMPLETED,
+            }
+
+        mock_agent.graph = MagicMock()
+        mock_agent.graph.astream = fake_astream
+
+        result = await mock_agent.process_question("question")
+
+        assert result["generation"] == "fresh"
+        assert len(mock_agent.answer_cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_miss_embeds_the_question_once(self, mock_agent):
+        """Retrieval searches with the embedding the cache lookup computed"""
+        search = (
+            mock_agent.vectorstore.similarity_search_by_vector_with_relevance_scores
+        )
+        search.return_value = []
+        mock_agent.embeddings.embed_query = MagicMock()
+
+        async def fake_astream(state, **kwargs):
+            update = await mock_agent.retrieve_documents(state)
+            yield "updates", {"retrieve": update}
+            yield "values", {**state, **update}
+
+        mock_agent.graph = MagicMock()
+        mock_agent.graph.astream = fake_astream
+
+        await mock_agent.process_question("question")
+
+        mock_agent.embeddings.aembed_query.assert_awaited_once_with("question")
+        mock_agent.embeddings.embed_query.assert_not_called()
+        search.assert_called_once_with([1.0, 0.0, 0.0], k=mock_agent.config.RETRIEVAL_K)
+
+    @pytest.mark.asyncio
+    async def test_fallback_answer_is_not_cached(self, mock_agent):
+        """Excerpts quoted while Ollama's circuit is open are not served later"""
+        for _ in range(mock_agent.config.BREAKER_FAILURE_THRESHOLD):
+            mock_agent.breakers["ollama"].record_failure()
+        doc = MagicMock(page_content="請假流程說明", metadata={"source": "hr.pdf"})
+
+        async def fake_astream(state, **kwargs):
+            state = {**state, "documents": [doc], "source": "vectorstore"}
+            update = await mock_agent.generate_answer(state)
+            yield "updates", {"generate": update}
+            yield "values", {**state, **update, "status": TaskStatus.COMPLETED}
+
+        mock_agent.graph = MagicMock()
+        mock_agent.graph.astream = fake_astream
+
+        result = await mock_agent.process_question("question")
+
+        assert "請假流程說明" in result["generation"]
+        assert result["degraded"]
+        assert len(mock_agent.answer_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_reingestion_invalidates_cache(self, mock_agent):
+        """A changed collection fingerprint clears the cache"""
+        mock_agent.config.INDEX_VERSION_CHECK_INTERVAL = 0
+        collection = MagicMock(id="v1", metadata={"ingested_at": "t1"})
+        mock_agent.chroma_client.get_collection.return_value = collection
+
+        await mock_agent._refresh_index()
+        mock_agent.answer_cache.store("q", [1.0, 0.0, 0.0], {"generation": "a"})
+
+        collection.metadata = {"ingested_at": "t2"}
+        await mock_agent._refresh_index()
+
+        assert len(mock_agent.answer_cache) == 0
@@ -0,0 +1,169 @@
+"""
+Tests for per-dependency circuit breakers
+"""
+
+import time
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.circuit_breaker import CircuitBreaker, CircuitState
+from app.core_agent import CoreAgent, Config, TaskStatus, AgentError
+
+
+class TestCircuitBreaker:
+    """Test suite for CircuitBreaker state transitions"""
+
+    def test_opens_after_threshold(self):
+        """Consecutive failures at the threshold open the circuit"""
+        breaker = CircuitBreaker("ollama", failure_threshold=3, reset_timeout=30)
+
+        for _ in range(3):
+            assert breaker.allow_request()
+            breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.is_open()
+        assert not breaker.allow_request()
+        assert breaker.stats()["rejected"] == 1
+
+    def test_success_resets_failure_count(self):
+        """A success in between keeps the circuit closed"""
+        breaker = CircuitBreaker("chroma", failure_threshold=2)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_half_open_allows_single_probe(self):
+        """After the reset timeout exactly one probe is let through"""
+        breaker = CircuitBreaker("tavily", failure_threshold=1, reset_timeout=10)
+        with patch("app.circuit_breaker.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+
+        with patch("app.circuit_breaker.time.monotonic", return_value=111.0):
+            assert breaker.allow_request()
+            assert breaker.state == CircuitState.HALF_OPEN
+            assert not breaker.allow_request()
+
+            breaker.record_success()
+            assert breaker.state == CircuitState.CLOSED
+
+    def test_failed_probe_reopens(self):
+        """A failing half-open probe opens the circuit again"""
+        breaker = CircuitBreaker("drive", failure_threshold=1, reset_timeout=10)
+        with patch("app.circuit_breaker.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+
+        with patch("app.circuit_breaker.time.monotonic", return_value=111.0):
+            assert breaker.allow_request()
+            breaker.record_failure()
+            assert breaker.state == CircuitState.OPEN
+            assert not breaker.allow_request()
+        assert breaker.stats()["times_opened"] == 2
+
+
+class TestCoreAgentBreakers:
+    """Test circuit breaker integration in CoreAgent"""
+
+    @pytest.fixture
+    @patch("app.core_agent.GoogleGenerativeAIEmbeddings")
+    @patch("app.core_agent.chromadb.HttpClient")
+    @patch("app.core_agent.Chroma")
+    @patch("app.core_agent.ChatOllama")
+    @patch("app.core_agent.TavilySearchResults")
+    def mock_agent(
+        self, mock_tavily, mock_ollama, mock_chroma, mock_http_client, mock_embeddings
+    ):
+        config = Config()
+        config.MAX_RETRIES = 3
+        config.RETRY_DELAY = 0.01
+        config.BREAKER_FAILURE_THRESHOLD = 2
+        return CoreAgent(config)
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast(self, mock_agent):
+        """Once open, calls fail immediately without further retries"""
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            raise ConnectionError("ollama down")
+
+        with pytest.raises(AgentError) as exc_info:
+            await mock_agent._retry_with_backoff(failing, dependency="ollama")
+        assert exc_info.value.error_code == "CIRCUIT_OPEN"
+        assert calls == 2
+
+        start = time.monotonic()
+        with pytest.raises(AgentError):
+            await mock_agent._retry_with_backoff(failing, dependency="ollama")
+        assert calls == 2
+        assert time.monotonic() - start < 0.01
+
+    @pytest.mark.asyncio
+    async def test_retrieval_skipped_when_chroma_open(self, mock_agent):
+        """An open Chroma circuit routes straight to web search"""
+        for _ in range(2):
+            mock_agent.breakers["chroma"].record_failure()
+
+        result = await mock_agent.retrieve_documents({"question": "q"})
+
+        assert result["documents"] == []
+        assert result["progress"]["step"] == "retrieval_skipped"
+        search = (
+            mock_agent.vectorstore.similarity_search_by_vector_with_relevance_scores
+        )
+        search.assert_not_called()
+        assert mock_agent.decide_to_generate(result) == "web_search"
+
+    @pytest.mark.asyncio
+    async def test_known_embedding_is_searched_while_embeddings_open(self, mock_agent):
+        """A question the answer cache already embedded needs only Chroma"""
+        for _ in range(2):
+            mock_agent.breakers["embeddings"].record_failure()
+        search = (
+            mock_agent.vectorstore.similarity_search_by_vector_with_relevance_scores
+        )
+        search.return_value = []
+
+        result = await mock_agent.retrieve_documents(
+            {"question": "q", "query_embedding": [0.5, 0.5]}
+        )
+
+        assert result["progress"]["step"] == "documents_retrieved"
+        search.assert_called_once_with([0.5, 0.5], k=mock_agent.config.RETRIEVAL_K)
+
+    @pytest.mark.asyncio
+    async def test_embedding_failures_trip_the_embeddings_breaker(self, mock_agent):
+        """A failing embedding API counts against embeddings, not Chroma"""
+        mock_agent.embeddings = MagicMock()
+        mock_agent.embeddings.embed_query.side_effect = ConnectionError("google down")
+        search = (
+            mock_agent.vectorstore.similarity_search_by_vector_with_relevance_scores
+        )
+
+        with patch("asyncio.sleep", new=AsyncMock()):
+            result = await mock_agent.retrieve_documents({"question": "q"})
+
+        assert result["status"] == TaskStatus.FAILED
+        search.assert_not_called()
+        assert mock_agent.breakers["embeddings"].is_open()
+        assert not mock_agent.breakers["chroma"].is_open()
+
+    @pytest.mark.asyncio
+    async def test_generation_falls_back_to_excerpts(self, mock_agent):
+        """An open Ollama circuit answers with document excerpts"""
+        for _ in range(2):
+            mock_agent.breakers["ollama"].record_failure()
+        doc = MagicMock(page_content="請假流程說明", metadata={"source": "hr.pdf"})
+
+        state = {"question": "q", "documents": [doc], "source": "vectorstore"}
+        result = await mock_agent.generate_answer(state)
+
+        assert "請假流程說明" in result["generation"]
+        assert "hr.pdf" in result["generation"]
+        assert result["status"] == TaskStatus.RUNNING
+        assert result["progress"]["step"] == "answer_fallback"
+        assert result["degraded"]
@@ -0,0 +1,130 @@
+"""
+Tests for blue/green collection versions and the alias
+"""
+
+import pytest
+from unittest.mock import patch
+from app.collection_alias import (
+    garbage_collect,
+    list_versions,
+    resolve_collection,
+    switch_alias,
+)
+from app.core_agent import CoreAgent, Config
+
+
+class FakeCollection:
+    def __init__(self, name, metadata=None):
+        self.name = name
+        self.id = f"id-{name}"
+        self.metadata = metadata
+
+    def modify(self, metadata):
+        self.metadata = metadata
+
+
+class FakeClient:
+    """Minimal chromadb client holding named collections"""
+
+    def __init__(self, *names):
+        self.collections = {name: FakeCollection(name) for name in names}
+
+    def list_collections(self):
+        return list(self.collections.values())
+
+    def get_collection(self, name):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist")
+        return self.collections[name]
+
+    def get_or_create_collection(self, name):
+        return self.collections.setdefault(name, FakeCollection(name))
+
+    def delete_collection(self, name):
+        del self.collections[name]
+
+
+class TestCollectionAlias:
+    """Test suite for the collection alias helpers"""
+
+    def test_resolves_plain_name_without_alias(self):
+        """Deployments from before versioning keep using the plain collection"""
+        client = FakeClient("internal_sop")
+
+        assert resolve_collection(client, "internal_sop") == "internal_sop"
+
+    def test_switch_repoints_alias(self):
+        """After a switch the alias resolves to the new version"""
+        client = FakeClient("internal_sop_v1", "internal_sop_v2")
+        switch_alias(client, "internal_sop", "internal_sop_v1")
+        switch_alias(client, "internal_sop", "internal_sop_v2")
+
+        assert resolve_collection(client, "internal_sop") == "internal_sop_v2"
+
+    def test_versions_sort_numerically(self):
+        """v10 is newer than v9"""
+        client = FakeClient("internal_sop_v9", "internal_sop_v10", "other_v1")
+
+        assert list_versions(client, "internal_sop") == [
+            (9, "internal_sop_v9"),
+            (10, "internal_sop_v10"),
+        ]
+
+    def test_garbage_collect_keeps_newest_and_live(self):
+        """Old versions and the legacy collection go; live and newest stay"""
+        client = FakeClient(
+            "internal_sop",
+            "internal_sop_v1",
+            "internal_sop_v2",
+            "internal_sop_v3",
+        )
+        switch_alias(client, "internal_sop", "internal_sop_v3")
+
+        deleted = garbage_collect(client, "internal_sop", keep=2)
+
+        assert sorted(deleted) == ["internal_sop", "internal_sop_v1"]
+        assert set(client.collections) == {
+            "internal_sop__alias",
+            "internal_sop_v2",
+            "internal_sop_v3",
+        }
+
+    def test_garbage_collect_never_deletes_live(self):
+        """A rolled-back alias pointing at an old version protects it"""
+        client = FakeClient("internal_sop_v1", "internal_sop_v2", "internal_sop_v3")
+        switch_alias(client, "internal_sop", "internal_sop_v1")
+
+        deleted = garbage_collect(client, "internal_sop", keep=1)
+
+        assert deleted == ["internal_sop_v2"]
+
+
+class TestCoreAgentAlias:
+    """Test that CoreAgent follows alias switches"""
+
+    @patch("app.core_agent.GoogleGenerativeAIEmbeddings")
+    @patch("app.core_agent.chromadb.HttpClient")
+    @patch("app.core_agent.Chroma")
+    @patch("app.core_agent.ChatOllama")
+    @patch("app.core_agent.TavilySearchResults")
+    @pytest.mark.asyncio
+    async def test_agent_switches_collection_without_restart(
+        self, mock_tavily, mock_ollama, mock_chroma, mock_http_client, mock_embeddings
+    ):
+        """A new alias target is picked up on the next index check"""
+        client = FakeClient("internal_sop_v1", "internal_sop_v2")
+        switch_alias(client, "internal_sop", "internal_sop_v1")
+        mock_http_client.return_value = client
+        config = Config()
+        config.INDEX_VERSION_CHECK_INTERVAL = 0
+
+        agent = CoreAgent(config)
+        assert agent.collection_name == "internal_sop_v1"
+        assert mock_chroma.call_args.kwargs["collection_name"] == "internal_sop_v1"
+
+        switch_alias(client, "internal_sop", "internal_sop_v2")
+        await agent._refresh_index()
+
+        assert agent.collection_name == "internal_sop_v2"
+        assert mock_chroma.call_args.kwargs["collection_name"] == "internal_sop_v2"
+        assert agent.vectorstore is mock_chroma.return_value
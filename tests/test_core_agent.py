@@ -4,7 +4,12 @@ Tests for the unified core agent functionality
 
 import pytest
 import asyncio
+import time
 from unittest.mock import patch, MagicMock, AsyncMock
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from prometheus_client import REGISTRY
 from app.core_agent import CoreAgent, Config, TaskStatus, AgentError
 
 
@@ -48,9 +53,11 @@ class TestCoreAgent:
         # Create agent
         agent = CoreAgent(mock_config)
 
-        # Mock the retriever
-        agent.retriever = MagicMock()
-        agent.retriever.get_relevant_documents = AsyncMock()
+        # Mock query embedding and the scored vector search (distance d -> 1 - d)
+        agent.embeddings = MagicMock()
+        agent.embeddings.embed_query.return_value = [0.1, 0.2]
+        agent.vectorstore = MagicMock()
+        agent.vectorstore._select_relevance_score_fn.return_value = lambda d: 1 - d
 
         return agent
 
@@ -59,7 +66,10 @@ class TestCoreAgent:
         """Test successful document retrieval"""
         # Setup
         mock_documents = [MagicMock(), MagicMock()]
-        mock_agent.retriever.get_relevant_documents.return_value = mock_documents
+        search = (
+            mock_agent.vectorstore.similarity_search_by_vector_with_relevance_scores
+        )
+        search.return_value = [(mock_documents[0], 0.1), (mock_documents[1], 0.5)]
 
         state = {"question": "test question"}
 
@@ -68,6 +78,8 @@ class TestCoreAgent:
 
         # Assert
         assert result["documents"] == mock_documents
+        assert result["document_scores"] == pytest.approx([0.9, 0.5])
+        search.assert_called_once_with([0.1, 0.2], k=mock_agent.config.RETRIEVAL_K)
         assert result["source"] == "vectorstore"
         assert result["status"] == TaskStatus.RUNNING
         assert "count" in result["progress"]
@@ -76,7 +88,10 @@ class TestCoreAgent:
     async def test_document_retrieval_failure(self, mock_agent):
         """Test document retrieval failure handling"""
         # Setup
-        mock_agent.retriever.get_relevant_documents.side_effect = Exception("DB Error")
+        search = (
+            mock_agent.vectorstore.similarity_search_by_vector_with_relevance_scores
+        )
+        search.side_effect = Exception("DB Error")
 
         state = {"question": "test question"}
 
@@ -88,12 +103,46 @@ class TestCoreAgent:
         assert result["status"] == TaskStatus.FAILED
         assert "DB Error" in result["error_message"]
 
+    @pytest.mark.asyncio
+    async def test_concurrent_retrievals_overlap(self, mock_agent):
+        """Blocking retrievals run off the event loop and overlap"""
+
+        def slow_retrieval(embedding, k):
+            time.sleep(0.2)
+            return [(MagicMock(), 0.5)]
+
+        mock_agent.vectorstore.similarity_search_by_vector_with_relevance_scores = (
+            slow_retrieval
+        )
+
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *(mock_agent.retrieve_documents({"question": f"q{i}"}) for i in range(4))
+        )
+        elapsed = time.monotonic() - start
+        beat.cancel()
+
+        assert all(len(r["documents"]) == 1 for r in results)
+        # Four sequential 0.2s retrievals would take 0.8s
+        assert elapsed < 0.5
+        # The event loop kept running while retrievals were in flight
+        assert ticks >= 5
+
     @pytest.mark.asyncio
     async def test_document_grading_relevant(self, mock_agent):
         """Test document grading when documents are relevant"""
         # Setup
         mock_documents = [MagicMock()]
-        mock_agent.llm_json.invoke = AsyncMock(return_value={"score": "yes"})
+        mock_agent.llm_json = FakeListChatModel(responses=['{"score": "yes"}'])
 
         state = {"question": "test question", "documents": mock_documents}
 
@@ -110,7 +159,7 @@ class TestCoreAgent:
         """Test document grading when documents are not relevant"""
         # Setup
         mock_documents = [MagicMock()]
-        mock_agent.llm_json.invoke = AsyncMock(return_value={"score": "no"})
+        mock_agent.llm_json = FakeListChatModel(responses=['{"score": "no"}'])
 
         state = {"question": "test question", "documents": mock_documents}
 
@@ -122,6 +171,56 @@ class TestCoreAgent:
         assert result["status"] == TaskStatus.RUNNING
         assert result["progress"]["grade"] == "not_relevant"
 
+    @pytest.mark.asyncio
+    async def test_grading_accepts_high_score_without_llm(self, mock_agent):
+        """A top score above the accept threshold skips the LLM grader"""
+        mock_agent.llm_json = MagicMock()
+        mock_documents = [MagicMock()]
+
+        state = {
+            "question": "test question",
+            "documents": mock_documents,
+            "document_scores": [0.95],
+        }
+        result = await mock_agent.grade_documents(state)
+
+        assert result["documents"] == mock_documents
+        assert result["progress"]["method"] == "score"
+        assert mock_agent.grading_stats["accepted_by_score"] == 1
+        assert mock_agent.grading_stats["llm_graded"] == 0
+
+    @pytest.mark.asyncio
+    async def test_grading_rejects_low_score_without_llm(self, mock_agent):
+        """A top score below the reject threshold goes straight to web search"""
+        mock_agent.llm_json = MagicMock()
+
+        state = {
+            "question": "test question",
+            "documents": [MagicMock()],
+            "document_scores": [0.1, 0.05],
+        }
+        result = await mock_agent.grade_documents(state)
+
+        assert result["documents"] == []
+        assert result["progress"]["grade"] == "not_relevant"
+        assert mock_agent.grading_stats["rejected_by_score"] == 1
+        assert mock_agent.decide_to_generate(result) == "web_search"
+
+    @pytest.mark.asyncio
+    async def test_grading_uses_llm_in_ambiguous_band(self, mock_agent):
+        """Scores between the thresholds defer to the LLM grader"""
+        mock_agent.llm_json = FakeListChatModel(responses=['{"score": "yes"}'])
+
+        state = {
+            "question": "test question",
+            "documents": [MagicMock()],
+            "document_scores": [0.6],
+        }
+        result = await mock_agent.grade_documents(state)
+
+        assert result["progress"]["method"] == "llm"
+        assert mock_agent.grading_stats["llm_graded"] == 1
+
     @pytest.mark.asyncio
     async def test_web_search_success(self, mock_agent):
         """Test successful web search"""
@@ -160,7 +259,7 @@ class TestCoreAgent:
     async def test_answer_generation_from_documents(self, mock_agent):
         """Test answer generation from documents"""
         # Setup
-        mock_agent.llm_text.invoke = AsyncMock(return_value="Generated answer")
+        mock_agent.llm_text = FakeListChatModel(responses=["Generated answer"])
 
         state = {
             "question": "test question",
@@ -180,7 +279,7 @@ class TestCoreAgent:
     async def test_answer_generation_from_web(self, mock_agent):
         """Test answer generation from web search results"""
         # Setup
-        mock_agent.llm_text.invoke = AsyncMock(return_value="Web-based answer")
+        mock_agent.llm_text = FakeListChatModel(responses=["Web-based answer"])
 
         state = {
             "question": "test question",
@@ -196,6 +295,133 @@ class TestCoreAgent:
         assert result["status"] == TaskStatus.RUNNING
         assert result["progress"]["source"] == "web_search"
 
+    @pytest.mark.asyncio
+    async def test_concurrent_generations_overlap(self, mock_agent):
+        """Generation awaits the LLM natively so concurrent answers overlap"""
+
+        async def slow_llm(prompt):
+            await asyncio.sleep(0.2)
+            return AIMessage(content="answer")
+
+        mock_agent.llm_text = RunnableLambda(slow_llm)
+        state = {"question": "q", "documents": ["doc"], "source": "vectorstore"}
+
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *(mock_agent.generate_answer(state) for _ in range(5))
+        )
+        elapsed = time.monotonic() - start
+
+        assert all(r["generation"] == "answer" for r in results)
+        # Five serialized 0.2s generations would take a full second
+        assert elapsed < 0.5
+
+    @pytest.mark.asyncio
+    async def test_speculative_search_discarded_when_relevant(self, mock_agent):
+        """The speculative web search is cancelled when documents are relevant"""
+        search_started = asyncio.Event()
+
+        async def slow_search(query):
+            search_started.set()
+            await asyncio.sleep(1)
+            return ["web"]
+
+        mock_agent.web_search_tool.invoke = slow_search
+        mock_agent.llm_json = FakeListChatModel(responses=['{"score": "yes"}'])
+
+        state = {"question": "test question", "documents": ["doc"]}
+        result = await mock_agent.grade_with_speculative_search(state)
+
+        assert result["documents"] == ["doc"]
+        assert "web_search_results" not in result
+        assert mock_agent.speculation_stats["launched"] == 1
+        assert mock_agent.speculation_stats["discarded"] == 1
+        assert mock_agent.speculation_stats["used"] == 0
+
+    @pytest.mark.asyncio
+    async def test_speculative_search_used_when_not_relevant(self, mock_agent):
+        """Search results are merged and the overlap is counted as saved latency"""
+
+        async def slow_search(query):
+            await asyncio.sleep(0.2)
+            return ["web1", "web2"]
+
+        async def slow_grader(prompt):
+            await asyncio.sleep(0.2)
+            return AIMessage(content='{"score": "no"}')
+
+        mock_agent.web_search_tool.invoke = slow_search
+        mock_agent.llm_json = RunnableLambda(slow_grader)
+
+        state = {"question": "test question", "documents": ["doc"]}
+        start = time.monotonic()
+        result = await mock_agent.grade_with_speculative_search(state)
+        elapsed = time.monotonic() - start
+
+        assert result["documents"] == []
+        assert result["web_search_results"] == ["web1", "web2"]
+        assert result["source"] == "web_search"
+        assert mock_agent.decide_to_generate(result) == "generate_from_web"
+        assert elapsed < 0.35
+        assert mock_agent.speculation_stats["used"] == 1
+        assert mock_agent.speculation_stats["latency_saved_seconds"] > 0.1
+
+    @pytest.mark.asyncio
+    async def test_failed_speculative_search_is_not_repeated(self, mock_agent):
+        """A failed speculative search goes straight to generation and is counted"""
+        calls = []
+
+        async def failing_search(query):
+            calls.append(query)
+            raise ConnectionError("tavily down")
+
+        mock_agent.web_search_tool.invoke = failing_search
+        mock_agent.llm_json = FakeListChatModel(responses=['{"score": "no"}'])
+        failed_before = REGISTRY.get_sample_value(
+            "sunnetchat_speculative_searches_total", {"outcome": "failed"}
+        )
+
+        with patch("asyncio.sleep", new=AsyncMock()):
+            result = await mock_agent.grade_with_speculative_search(
+                {"question": "test question", "documents": ["doc"]}
+            )
+
+        assert calls
+        assert result["web_search_results"] is None
+        # Routed past the web_search node, so Tavily isn't called again
+        assert mock_agent.decide_to_generate(result) == "generate_from_web"
+        assert mock_agent.speculation_stats["failed"] == 1
+        assert (
+            REGISTRY.get_sample_value(
+                "sunnetchat_speculative_searches_total", {"outcome": "failed"}
+            )
+            == (failed_before or 0) + 1
+        )
+
+    @pytest.mark.asyncio
+    async def test_identical_questions_are_coalesced(self, mock_agent):
+        """Concurrent identical questions share a single graph run"""
+        calls = []
+
+        async def slow_run(question, on_token=None):
+            calls.append(question)
+            await asyncio.sleep(0.1)
+            return {"generation": "shared answer", "status": TaskStatus.COMPLETED}
+
+        mock_agent._run_question = slow_run
+
+        questions = ["如何申請VPN？", "如何申請VPN", "  如何申請vpn?", "如何申請 VPN"]
+        results = await asyncio.gather(
+            *(mock_agent.process_question(q) for q in questions)
+        )
+
+        # "如何申請 VPN" differs by an inner space and runs on its own
+        assert len(calls) == 2
+        assert all(r["generation"] == "shared answer" for r in results)
+        assert [r["question"] for r in results] == questions
+        assert mock_agent.coalescing_stats == {"executed": 2, "coalesced": 2}
+        assert mock_agent._inflight == {}
+
     @pytest.mark.asyncio
     async def test_retry_mechanism(self, mock_agent):
         """Test the retry mechanism with exponential backoff"""
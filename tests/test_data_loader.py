@@ -1,6 +1,17 @@
 import os
+import types
 import pytest
-from app.data_processor import load_documents_from_path
+from unittest.mock import MagicMock, patch
+from app import data_processor
+from app.data_processor import (
+    FormatStats,
+    LoadError,
+    detect_mime_type,
+    get_loader,
+    iter_documents,
+    load_documents_from_path,
+)
+from tests.test_pdf_loader import write_pdf
 
 # Define the path to the test data directory for clarity
 TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), "test_data")
@@ -71,3 +82,149 @@ def test_load_documents_from_directory(setup_dummy_files):
     sources = {os.path.basename(doc.metadata["source"]) for doc in documents}
     expected_sources = {"doc1.txt", "doc2.pdf", "doc3.docx"}
     assert sources == expected_sources
+
+
+@pytest.fixture
+def mixed_dir(tmp_path):
+    """A directory with a two-page PDF, text files, a broken PDF and an unsupported file"""
+    (tmp_path / "sub").mkdir()
+    write_pdf(
+        tmp_path / "a.pdf",
+        ["Standard operating procedure page one", "Escalation contacts on page two"],
+    )
+    (tmp_path / "b.txt").write_text("Plain text notes.", encoding="utf-8")
+    (tmp_path / "broken.pdf").write_text("not a pdf", encoding="utf-8")
+    (tmp_path / "ignored.xyz").write_text("Some data", encoding="utf-8")
+    (tmp_path / "sub" / "c.txt").write_text("Nested notes.", encoding="utf-8")
+    return tmp_path
+
+
+def test_iter_documents_is_lazy_and_yields_pdf_pages(mixed_dir):
+    """Documents arrive one at a time, one per PDF page, in walk order"""
+    documents = iter_documents(str(mixed_dir), on_error=lambda error: None)
+
+    assert isinstance(documents, types.GeneratorType)
+    first = next(documents)
+    assert first.metadata["page"] == 0
+    assert "page one" in first.page_content
+    rest = [
+        (os.path.relpath(doc.metadata["source"], mixed_dir), doc.metadata.get("page"))
+        for doc in documents
+    ]
+    assert rest == [
+        ("a.pdf", 1),
+        ("b.txt", None),
+        (os.path.join("sub", "c.txt"), None),
+    ]
+
+
+def test_iter_documents_reports_errors_instead_of_placeholders(mixed_dir):
+    """A broken file is reported as a LoadError and yields nothing"""
+    errors = []
+
+    documents = list(iter_documents(str(mixed_dir), on_error=errors.append))
+
+    assert all(doc.page_content for doc in documents)
+    [error] = errors
+    assert isinstance(error, LoadError)
+    assert error.source == str(mixed_dir / "broken.pdf")
+    assert error.error_type and error.message
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_iter_documents_prefetch_keeps_walk_order(mixed_dir, use_processes):
+    """Pool prefetching yields the same documents, in the same order"""
+    sequential = list(iter_documents(str(mixed_dir), on_error=lambda error: None))
+    errors = []
+
+    prefetched = list(
+        iter_documents(
+            str(mixed_dir),
+            workers=2,
+            use_processes=use_processes,
+            prefetch=1,
+            on_error=errors.append,
+        )
+    )
+
+    assert [doc.page_content for doc in prefetched] == [
+        doc.page_content for doc in sequential
+    ]
+    assert [error.source for error in errors] == [str(mixed_dir / "broken.pdf")]
+
+
+def test_iter_documents_rejects_unsupported_single_file(mixed_dir):
+    with pytest.raises(NotImplementedError):
+        list(iter_documents(str(mixed_dir / "ignored.xyz")))
+    with pytest.raises(FileNotFoundError):
+        list(iter_documents(str(mixed_dir / "missing.txt")))
+
+
+def sniffing(mime_type):
+    """Patch libmagic to report mime_type for every file"""
+    fake = MagicMock()
+    fake.from_file.return_value = mime_type
+    return patch.object(data_processor, "magic", fake)
+
+
+def test_extension_decides_without_libmagic(tmp_path):
+    with patch.object(data_processor, "magic", None):
+        assert detect_mime_type(str(tmp_path / "a.MD")) == "text/markdown"
+        assert detect_mime_type(str(tmp_path / "a.csv")) == "text/csv"
+        assert detect_mime_type(str(tmp_path / "a.pptx")).endswith("presentation")
+
+
+def test_sniffed_content_overrides_a_wrong_extension(tmp_path):
+    """A PDF saved as .doc is loaded as a PDF"""
+    with sniffing("application/pdf"):
+        assert detect_mime_type(str(tmp_path / "scan.doc")) == "application/pdf"
+        assert type(get_loader(str(tmp_path / "scan.doc"))).__name__ == (
+            "TextFirstPDFLoader"
+        )
+
+
+@pytest.mark.parametrize("sniffed", ["text/plain", "application/zip", "inode/x-empty"])
+def test_generic_sniff_results_defer_to_the_extension(tmp_path, sniffed):
+    with sniffing(sniffed):
+        assert detect_mime_type(str(tmp_path / "notes.md")) == "text/markdown"
+        assert detect_mime_type(str(tmp_path / "deck.pptx")).endswith("presentation")
+        with pytest.raises(NotImplementedError):
+            get_loader(str(tmp_path / "data.xyz"))
+
+
+def test_csv_rows_are_joined_into_one_document(tmp_path):
+    path = tmp_path / "hosts.csv"
+    path.write_text("\ufeffhost,owner\nvpn01,ops\nmail01,it\n", encoding="utf-8")
+
+    [document] = load_documents_from_path(str(path))
+
+    assert document.page_content == "host: vpn01\nowner: ops\n\nhost: mail01\nowner: it"
+    assert document.metadata["rows"] == 2
+
+
+def test_html_is_reduced_to_text(tmp_path):
+    pytest.importorskip("bs4")
+    path = tmp_path / "page.html"
+    path.write_text(
+        "<html><head><title>VPN</title></head><body><p>Restart</p></body></html>",
+        encoding="utf-8",
+    )
+
+    [document] = load_documents_from_path(str(path))
+
+    assert "Restart" in document.page_content
+    assert "<p>" not in document.page_content
+    assert document.metadata["title"] == "VPN"
+
+
+def test_parse_time_is_tracked_per_format(mixed_dir):
+    stats = FormatStats()
+
+    list(iter_documents(str(mixed_dir), on_error=lambda error: None, stats=stats))
+
+    rows = {row["format"]: row for row in stats.summary()}
+    assert set(rows) == {"pdf", "text"}
+    assert (rows["pdf"]["files"], rows["pdf"]["failed"]) == (2, 1)
+    assert (rows["pdf"]["documents"], rows["text"]["documents"]) == (2, 2)
+    assert rows["text"]["bytes"] == len("Plain text notes.") + len("Nested notes.")
+    assert sum(row["share"] for row in rows.values()) == pytest.approx(1.0)
@@ -0,0 +1,63 @@
+"""
+Tests for near-duplicate chunk detection
+"""
+
+from app.dedup import SimHashIndex, hamming, shingles, simhash
+
+SOP = (
+    "員工請假應於三個工作日前透過人事系統提出申請，經直屬主管核准後始得休假。"
+    "病假超過三日者須檢附醫療院所開立之診斷證明書。特別休假依勞動基準法規定，"
+    "年資滿六個月以上未滿一年者給予三日，滿一年以上未滿二年者給予七日。"
+    "All leave requests must be submitted through the HR portal in advance."
+)
+
+
+class TestShingles:
+    """Test CJK-aware shingling"""
+
+    def test_cjk_is_shingled_by_character_and_english_by_word(self):
+        assert shingles("標準作業 SOP review") == [
+            "標 準 作",
+            "準 作 業",
+            "作 業 sop",
+            "業 sop review",
+        ]
+
+    def test_short_text_is_one_shingle(self):
+        assert shingles("目錄") == ["目 錄"]
+        assert shingles("  ") == []
+
+
+class TestSimHash:
+    """Test fingerprints and the index"""
+
+    def test_small_edits_stay_close(self):
+        revised = SOP.replace("始得休假", "方可休假").replace(
+            "in advance", "beforehand"
+        )
+        assert hamming(simhash(SOP), simhash(SOP)) == 0
+        assert hamming(simhash(SOP), simhash(revised)) <= 6
+
+    def test_unrelated_text_is_far(self):
+        other = (
+            "伺服器備份於每日凌晨兩點執行，保留三十天，並每週將備份送至異地機房保存。"
+        )
+        assert hamming(simhash(SOP), simhash(other)) > 12
+
+    def test_index_finds_closest_within_distance(self):
+        index = SimHashIndex(max_distance=3)
+        index.add("exact", 0b1011 << 40)
+        index.add("near", (0b1011 << 40) ^ 0b11)
+        index.add("far", ~(0b1011 << 40) & (2**64 - 1))
+
+        assert index.find(0b1011 << 40) == "exact"
+        assert index.find(0b1011 << 40, exclude={"exact"}) == "near"
+        assert index.find(0b1011 << 40, exclude={"exact", "near"}) is None
+
+    def test_removed_keys_are_not_found(self):
+        index = SimHashIndex()
+        index.add("a", simhash(SOP))
+        index.remove("a")
+
+        assert index.find(simhash(SOP)) is None
+        assert len(index) == 0
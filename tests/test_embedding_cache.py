@@ -0,0 +1,145 @@
+"""
+Tests for the persistent embedding cache
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+from app.embedding_cache import EmbeddingStore, CachedEmbeddings
+from app.core_agent import CoreAgent, Config
+
+
+class CountingEmbeddings:
+    """Embeds each text as [len(text), 1.0] and records what was embedded"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.embedded.append(text)
+        return [float(len(text)), 0.0]
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+
+class TestEmbeddingStore:
+    """Test suite for EmbeddingStore"""
+
+    def test_round_trip_and_stats(self, tmp_path):
+        """Stored vectors come back in input order; misses are None"""
+        store = EmbeddingStore(str(tmp_path / "cache.sqlite3"))
+        store.put_many("m", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+
+        assert store.get_many("m", ["b", "c", "a"]) == [[3.0, 4.0], None, [1.0, 2.0]]
+        stats = store.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["entries"] == 2
+
+    def test_namespaces_are_separate(self, tmp_path):
+        """The same text under another model is a miss"""
+        store = EmbeddingStore(str(tmp_path / "cache.sqlite3"))
+        store.put_many("model-a", ["text"], [[1.0]])
+
+        assert store.get_many("model-b", ["text"]) == [None]
+
+    def test_persists_across_instances(self, tmp_path):
+        """A second process opening the same file sees earlier vectors"""
+        path = str(tmp_path / "cache.sqlite3")
+        EmbeddingStore(path).put_many("m", ["a"], [[0.5]])
+
+        assert EmbeddingStore(path).get_many("m", ["a"]) == [[0.5]]
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Exceeding the cap trims the least recently used entries"""
+        store = EmbeddingStore(str(tmp_path / "cache.sqlite3"), max_entries=10)
+        with patch("app.embedding_cache.time.time", side_effect=range(100)):
+            store.put_many("m", [f"t{i}" for i in range(10)], [[1.0]] * 10)
+            store.get_many("m", ["t0"])  # t0 becomes most recently used
+            store.put_many("m", ["new"], [[2.0]])
+
+        assert len(store) == 9
+        assert store.evictions == 2
+        assert store.get_many("m", ["t0", "t1", "t2", "new"]) == [
+            [1.0],
+            None,
+            None,
+            [2.0],
+        ]
+
+
+class TestCachedEmbeddings:
+    """Test suite for CachedEmbeddings"""
+
+    def test_only_uncached_documents_are_embedded(self, tmp_path):
+        """Cached texts are served from the store, duplicates embedded once"""
+        base = CountingEmbeddings()
+        embeddings = CachedEmbeddings(
+            base, EmbeddingStore(str(tmp_path / "c.sqlite3")), "model"
+        )
+        embeddings.embed_documents(["a", "bb"])
+
+        vectors = embeddings.embed_documents(["bb", "ccc", "ccc", "a"])
+
+        assert base.embedded == ["a", "bb", "ccc"]
+        assert vectors == [[2.0, 1.0], [3.0, 1.0], [3.0, 1.0], [1.0, 1.0]]
+
+    @pytest.mark.asyncio
+    async def test_query_and_document_vectors_are_cached_separately(self, tmp_path):
+        """A query never reuses a document vector for the same text"""
+        base = CountingEmbeddings()
+        embeddings = CachedEmbeddings(
+            base, EmbeddingStore(str(tmp_path / "c.sqlite3")), "model"
+        )
+        embeddings.embed_documents(["q"])
+
+        first = await embeddings.aembed_query("q")
+        second = await embeddings.aembed_query("q")
+
+        assert first == second == [1.0, 0.0]
+        assert base.embedded == ["q", "q"]
+
+    def test_store_failure_falls_back_to_provider(self):
+        """A broken store is treated as a miss"""
+        store = MagicMock()
+        store.get_many.side_effect = Exception("disk I/O error")
+        store.put_many.side_effect = Exception("disk I/O error")
+        embeddings = CachedEmbeddings(CountingEmbeddings(), store, "model")
+
+        assert embeddings.embed_query("abc") == [3.0, 0.0]
+
+
+class TestCoreAgentEmbeddingCache:
+    """Test the embedding cache wiring in CoreAgent"""
+
+    @patch("app.core_agent.GoogleGenerativeAIEmbeddings")
+    @patch("app.core_agent.chromadb.HttpClient")
+    @patch("app.core_agent.Chroma")
+    @patch("app.core_agent.ChatOllama")
+    @patch("app.core_agent.TavilySearchResults")
+    def test_agent_wraps_embeddings_when_enabled(
+        self,
+        mock_tavily,
+        mock_ollama,
+        mock_chroma,
+        mock_http_client,
+        mock_embeddings,
+        tmp_path,
+    ):
+        """The vector store is given the cached embeddings"""
+        config = Config()
+        config.EMBEDDING_CACHE_ENABLED = True
+        config.EMBEDDING_CACHE_PATH = str(tmp_path / "cache.sqlite3")
+
+        agent = CoreAgent(config)
+
+        assert isinstance(agent.embeddings, CachedEmbeddings)
+        assert agent.embeddings.embeddings is mock_embeddings.return_value
+        assert mock_chroma.call_args.kwargs["embedding_function"] is agent.embeddings
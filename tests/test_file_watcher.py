@@ -0,0 +1,99 @@
+"""
+Tests for change debouncing and polling used by the ingest watcher
+"""
+
+import os
+
+from app.file_watcher import ChangeBatcher, PollingScanner
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestChangeBatcher:
+    """Test per-file debouncing and batching"""
+
+    def test_path_is_released_once_quiet(self):
+        """Repeated events for a file yield it once, after the debounce"""
+        clock = FakeClock()
+        batcher = ChangeBatcher(debounce=5, max_wait=60, clock=clock)
+        batcher.add("a.pdf")
+        clock.now += 3
+        batcher.add("a.pdf")
+        clock.now += 3
+
+        assert batcher.take(10) == {}
+
+        clock.now += 2
+        assert batcher.take(10) == {"a.pdf": 100.0}
+        assert batcher.take(10) == {}
+
+    def test_busy_path_is_released_after_max_wait(self):
+        """A file that never goes quiet is still ingested eventually"""
+        clock = FakeClock()
+        batcher = ChangeBatcher(debounce=5, max_wait=12, clock=clock)
+        for _ in range(4):
+            batcher.add("log.txt")
+            clock.now += 3
+
+        assert batcher.take(10) == {"log.txt": 100.0}
+
+    def test_batches_are_limited_oldest_first(self):
+        """take() returns at most `limit` paths, the oldest changes first"""
+        clock = FakeClock()
+        batcher = ChangeBatcher(debounce=1, max_wait=60, clock=clock)
+        for name in ("c.txt", "a.txt", "b.txt"):
+            batcher.add(name)
+            clock.now += 1
+
+        assert list(batcher.take(2)) == ["c.txt", "a.txt"]
+        assert batcher.backlog() == (1, 1.0)
+
+    def test_requeued_path_keeps_its_first_seen_time(self):
+        """A failed batch goes back with its original times, so lag stays honest"""
+        clock = FakeClock()
+        batcher = ChangeBatcher(debounce=1, max_wait=60, clock=clock)
+        batcher.add("a.txt")
+        clock.now += 2
+        batch = batcher.take(10)
+
+        clock.now += 30
+        batcher.add("a.txt", first_seen=batch["a.txt"])
+
+        assert batcher.backlog() == (1, 32.0)
+
+
+class TestPollingScanner:
+    """Test snapshot-based change detection"""
+
+    def test_reports_created_modified_and_deleted_files(self, tmp_path):
+        (tmp_path / "a.txt").write_text("alpha", encoding="utf-8")
+        (tmp_path / "b.txt").write_text("beta", encoding="utf-8")
+        scanner = PollingScanner(
+            lambda: [str(path) for path in sorted(tmp_path.iterdir())]
+        )
+
+        assert scanner.changes() == []
+
+        (tmp_path / "a.txt").write_text("alpha, revised", encoding="utf-8")
+        (tmp_path / "b.txt").unlink()
+        (tmp_path / "c.txt").write_text("gamma", encoding="utf-8")
+
+        assert scanner.changes() == [
+            str(tmp_path / name) for name in ("a.txt", "b.txt", "c.txt")
+        ]
+        assert scanner.changes() == []
+
+    def test_touched_file_is_reported(self, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_text("alpha", encoding="utf-8")
+        scanner = PollingScanner(lambda: [str(path)])
+
+        os.utime(path, (0, 0))
+
+        assert scanner.changes() == [str(path)]
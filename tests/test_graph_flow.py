@@ -5,6 +5,8 @@ Maintains backward compatibility while using the unified architecture
 
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListChatModel
 
 
 class TestLegacyCompatibility:
@@ -33,19 +35,21 @@ class TestLegacyCompatibility:
         mock_vectorstore = MagicMock()
         mock_chroma.return_value = mock_vectorstore
 
-        # Mock retriever
-        mock_retriever = MagicMock()
-        mock_retriever.get_relevant_documents.return_value = ["本地文件內容"]
-        mock_vectorstore.as_retriever.return_value = mock_retriever
+        # Mock retrieval: the query is embedded, then searched by vector
+        mock_query_embeddings = MagicMock()
+        mock_query_embeddings.embed_query.return_value = [0.1, 0.2]
+        document = Document(page_content="本地文件內容", metadata={"source": "sop.pdf"})
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [
+            (document, 0.5)
+        ]
+        mock_vectorstore._select_relevance_score_fn.return_value = lambda d: 1 - d
 
         # Mock LLMs
-        mock_json_llm = MagicMock()
-        mock_json_llm.invoke = AsyncMock(return_value={"score": "yes"})
+        mock_json_llm = FakeListChatModel(responses=['{"score": "yes"}'])
 
-        mock_text_llm = MagicMock()
-        mock_text_llm.invoke = AsyncMock(return_value="從本地文件生成的答案")
+        mock_text_llm = FakeListChatModel(responses=["從本地文件生成的答案"])
 
-        mock_ollama.side_effect = [mock_json_llm, mock_text_llm]
+        mock_ollama.return_value = mock_text_llm
 
         mock_tavily.return_value = MagicMock()
 
@@ -55,7 +59,11 @@ class TestLegacyCompatibility:
         # Mock the core agent methods
         with patch.object(graph._agent, "llm_json", mock_json_llm), patch.object(
             graph._agent, "llm_text", mock_text_llm
-        ), patch.object(graph._agent, "retriever", mock_retriever):
+        ), patch.object(graph._agent, "vectorstore", mock_vectorstore), patch.object(
+            graph._agent, "embeddings", mock_query_embeddings
+        ), patch.object(
+            graph._agent, "answer_cache", None
+        ):
 
             # Test using the compatibility interface
             inputs = {"question": "test"}
@@ -63,6 +71,10 @@ class TestLegacyCompatibility:
 
             # Assertions
             assert result["generation"] == "從本地文件生成的答案"
+            assert result["source"] == "vectorstore"
+            assert result["documents"] == [document]
+            assert not result["error_message"]
+            mock_query_embeddings.embed_query.assert_called_once_with("test")
             # Upload should not be called for vectorstore results
             mock_upload.assert_not_called()
 
@@ -89,19 +101,21 @@ class TestLegacyCompatibility:
         mock_vectorstore = MagicMock()
         mock_chroma.return_value = mock_vectorstore
 
-        # Mock retriever
-        mock_retriever = MagicMock()
-        mock_retriever.get_relevant_documents.return_value = ["文件內容"]
-        mock_vectorstore.as_retriever.return_value = mock_retriever
+        # Mock retrieval: the query is embedded, then searched by vector
+        mock_query_embeddings = MagicMock()
+        mock_query_embeddings.embed_query.return_value = [0.1, 0.2]
+        document = Document(page_content="文件內容", metadata={"source": "sop.pdf"})
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [
+            (document, 0.5)
+        ]
+        mock_vectorstore._select_relevance_score_fn.return_value = lambda d: 1 - d
 
         # Mock LLMs - grader returns 'no' to trigger web search
-        mock_json_llm = MagicMock()
-        mock_json_llm.invoke = AsyncMock(return_value={"score": "no"})
+        mock_json_llm = FakeListChatModel(responses=['{"score": "no"}'])
 
-        mock_text_llm = MagicMock()
-        mock_text_llm.invoke = AsyncMock(return_value="從網路搜尋生成的答案")
+        mock_text_llm = FakeListChatModel(responses=["從網路搜尋生成的答案"])
 
-        mock_ollama.side_effect = [mock_json_llm, mock_text_llm]
+        mock_ollama.return_value = mock_text_llm
 
         # Mock web search tool
         mock_web_search = MagicMock()
@@ -114,8 +128,12 @@ class TestLegacyCompatibility:
         # Mock the core agent methods
         with patch.object(graph._agent, "llm_json", mock_json_llm), patch.object(
             graph._agent, "llm_text", mock_text_llm
-        ), patch.object(graph._agent, "retriever", mock_retriever), patch.object(
+        ), patch.object(graph._agent, "vectorstore", mock_vectorstore), patch.object(
             graph._agent, "web_search_tool", mock_web_search
+        ), patch.object(
+            graph._agent, "embeddings", mock_query_embeddings
+        ), patch.object(
+            graph._agent, "answer_cache", None
         ):
 
             # Test using the compatibility interface
@@ -124,6 +142,10 @@ class TestLegacyCompatibility:
 
             # Assertions
             assert result["generation"] == "從網路搜尋生成的答案"
+            assert result["source"] == "web_search"
+            assert result["web_search_results"]
+            assert not result["error_message"]
+            mock_query_embeddings.embed_query.assert_called_once_with("test")
             # Web search should have been called
             mock_web_search.invoke.assert_called()
 
@@ -0,0 +1,122 @@
+"""
+Tests for Prometheus metrics
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+from prometheus_client import REGISTRY
+
+from app.core_agent import CoreAgent, Config, AgentError, TaskStatus
+from app.metrics import render_metrics
+from app.work_queue import WorkQueue
+
+
+def sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+class TestAgentMetrics:
+    """Test metrics recorded by CoreAgent"""
+
+    @pytest.fixture
+    @patch("app.core_agent.GoogleGenerativeAIEmbeddings")
+    @patch("app.core_agent.chromadb.HttpClient")
+    @patch("app.core_agent.Chroma")
+    @patch("app.core_agent.ChatOllama")
+    @patch("app.core_agent.TavilySearchResults")
+    def mock_agent(
+        self, mock_tavily, mock_ollama, mock_chroma, mock_http_client, mock_embeddings
+    ):
+        config = Config()
+        config.ANSWER_CACHE_ENABLED = False
+        config.RETRY_DELAY = 0
+        return CoreAgent(config)
+
+    @pytest.mark.asyncio
+    async def test_node_and_question_latency(self, mock_agent):
+        """Each node update and the finished question are observed"""
+
+        async def fake_astream(state, **kwargs):
+            yield "updates", {"retrieve": {}}
+            yield "updates", {"generate_from_docs": {}}
+            yield "values", {
+                **state,
+                "generation": "answer",
+                "source": "vectorstore",
+                "status": TaskStatus.COMPLETED,
+            }
+
+        mock_agent.graph = MagicMock()
+        mock_agent.graph.astream = fake_astream
+        node_label = {"node": "generate_from_docs"}
+        source_label = {"source": "vectorstore"}
+        nodes_before = sample(
+            "sunnetchat_graph_node_duration_seconds_count", node_label
+        )
+        answers_before = sample("sunnetchat_answers_total", source_label)
+        latency_before = sample(
+            "sunnetchat_question_duration_seconds_count", source_label
+        )
+
+        await mock_agent.process_question("metrics question")
+
+        assert (
+            sample("sunnetchat_graph_node_duration_seconds_count", node_label)
+            == nodes_before + 1
+        )
+        assert sample("sunnetchat_answers_total", source_label) == answers_before + 1
+        assert (
+            sample("sunnetchat_question_duration_seconds_count", source_label)
+            == latency_before + 1
+        )
+
+    @pytest.mark.asyncio
+    async def test_retries_are_counted_per_dependency(self, mock_agent):
+        """Every retried attempt increments the dependency's retry counter"""
+        labels = {"dependency": "tavily"}
+        before = sample("sunnetchat_retries_total", labels)
+        failing = AsyncMock(side_effect=Exception("down"))
+
+        with pytest.raises(AgentError):
+            await mock_agent._retry_with_backoff(failing, dependency="tavily")
+
+        expected = before + mock_agent.config.MAX_RETRIES - 1
+        assert sample("sunnetchat_retries_total", labels) == expected
+
+
+class TestQueueMetrics:
+    """Test queue gauges and the /metrics output"""
+
+    @pytest.mark.asyncio
+    async def test_queue_gauges_track_depth_and_in_flight(self):
+        """Depth and in-flight gauges follow jobs through the queue"""
+        queue = WorkQueue(workers=1, max_depth=5)
+        release = asyncio.Event()
+        depth_before = sample("sunnetchat_queue_depth")
+        in_flight_before = sample("sunnetchat_queue_in_flight")
+
+        async def job():
+            await release.wait()
+
+        queue.submit(job)
+        queue.submit(job)
+        await asyncio.sleep(0)
+
+        assert sample("sunnetchat_queue_depth") == depth_before + 1
+        assert sample("sunnetchat_queue_in_flight") == in_flight_before + 1
+
+        release.set()
+        await queue.join()
+        await queue.stop()
+
+        assert sample("sunnetchat_queue_depth") == depth_before
+        assert sample("sunnetchat_queue_in_flight") == in_flight_before
+
+    def test_render_metrics_exposition(self):
+        """The rendered payload is Prometheus text format"""
+        content, content_type = render_metrics()
+
+        assert content_type.startswith("text/plain")
+        assert b"sunnetchat_graph_node_duration_seconds" in content
+        assert b"sunnetchat_queue_depth" in content
@@ -0,0 +1,54 @@
+"""
+Tests for the native PowerPoint and Excel loaders
+"""
+
+import pytest
+from app.office_loaders import PptxLoader, XlsxLoader
+
+
+def test_pptx_slides_become_pages(tmp_path):
+    pptx = pytest.importorskip("pptx")
+    from pptx.util import Inches
+
+    presentation = pptx.Presentation()
+    layout = presentation.slide_layouts[1]
+    slide = presentation.slides.add_slide(layout)
+    slide.shapes.title.text = "VPN outage"
+    slide.placeholders[1].text = "Restart the concentrator"
+    slide.notes_slide.notes_text_frame.text = "Call the NOC first"
+    presentation.slides.add_slide(presentation.slide_layouts[6])  # blank
+    slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    table = slide.shapes.add_table(2, 2, Inches(1), Inches(1), Inches(4), Inches(1))
+    for row, values in enumerate([("host", "owner"), ("vpn01", "ops")]):
+        for column, value in enumerate(values):
+            table.table.cell(row, column).text = value
+    path = str(tmp_path / "deck.pptx")
+    presentation.save(path)
+
+    documents = list(PptxLoader(path).lazy_load())
+
+    assert [doc.metadata["page"] for doc in documents] == [0, 2]
+    assert documents[0].page_content == (
+        "VPN outage\nRestart the concentrator\nCall the NOC first"
+    )
+    assert documents[1].page_content == "host | owner\nvpn01 | ops"
+    assert documents[1].metadata["total_pages"] == 3
+
+
+def test_xlsx_sheets_become_tab_separated_documents(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Hosts"
+    sheet.append(["host", "owner", None])
+    sheet.append([None, None, None])
+    sheet.append(["vpn01", "ops", 3])
+    workbook.create_sheet("Empty")
+    path = str(tmp_path / "hosts.xlsx")
+    workbook.save(path)
+
+    [document] = list(XlsxLoader(path).lazy_load())
+
+    assert document.page_content == "host\towner\nvpn01\tops\t3"
+    assert document.metadata["sheet"] == "Hosts"
@@ -0,0 +1,122 @@
+"""
+Tests for the text-layer-first PDF loader
+"""
+
+from unittest.mock import patch
+from app.pdf_loader import TextFirstPDFLoader, is_garbled
+
+
+def write_pdf(path, pages):
+    """Write a minimal PDF with one Helvetica text line per page ("" = scanned page)"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode() if text else b""
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        content = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(kids),
+        len(kids),
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(bytes(out))
+    return str(path)
+
+
+class TestIsGarbled:
+    """Test the text layer quality check"""
+
+    def test_readable_text_is_kept(self):
+        assert not is_garbled("This is page one of the onboarding SOP.")
+        assert not is_garbled("請依照標準作業程序完成新進人員報到手續。")
+
+    def test_missing_or_short_text_needs_ocr(self):
+        assert is_garbled("")
+        assert is_garbled("  3  ")
+
+    def test_broken_font_encodings_need_ocr(self):
+        assert is_garbled("(cid:12)(cid:45)(cid:78)(cid:90)(cid:11)(cid:23)")
+        assert is_garbled("  abc ��")
+
+
+class TestTextFirstPDFLoader:
+    """Test page-level OCR fallback"""
+
+    def test_only_pages_without_text_are_ocrd(self, tmp_path):
+        """Text pages are extracted, the scanned page goes to OCR"""
+        path = write_pdf(
+            tmp_path / "sop.pdf",
+            [
+                "Page one has a proper text layer.",
+                "",
+                "Page three is a text page as well.",
+            ],
+        )
+        loader = TextFirstPDFLoader(path)
+
+        with patch.object(loader, "_ocr_page", return_value="scanned text") as ocr:
+            docs = list(loader.lazy_load())
+
+        ocr.assert_called_once_with(1)
+        assert [d.metadata["extraction"] for d in docs] == [
+            "text_layer",
+            "ocr",
+            "text_layer",
+        ]
+        assert "proper text layer" in docs[0].page_content
+        assert docs[1].page_content == "scanned text"
+        assert docs[2].metadata["page"] == 2
+        assert docs[2].metadata["total_pages"] == 3
+        assert loader.stats["pages"] == 3
+        assert loader.stats["text_layer"] == 2
+        assert loader.stats["ocr"] == 1
+
+    def test_failed_ocr_keeps_text_layer(self, tmp_path):
+        """A page is still returned when OCR is unavailable, marked as failed"""
+        path = write_pdf(tmp_path / "scan.pdf", [""])
+        loader = TextFirstPDFLoader(path)
+
+        with patch.object(
+            loader, "_ocr_page", side_effect=OSError("tesseract not found")
+        ):
+            [doc] = loader.load()
+
+        assert doc.metadata["extraction"] == "ocr_failed"
+        assert loader.stats["ocr_failed"] == 1
+        assert loader.stats["ocr"] == 0
+        assert loader.stats["text_layer"] == 0
+
+    def test_blank_pages_are_counted(self, tmp_path):
+        """A page with no text even after OCR is counted as empty"""
+        path = write_pdf(tmp_path / "scan.pdf", ["A page with a real text layer.", ""])
+        loader = TextFirstPDFLoader(path)
+
+        with patch.object(loader, "_ocr_page", return_value="  \n"):
+            docs = loader.load()
+
+        assert [d.metadata["extraction"] for d in docs] == ["text_layer", "empty"]
+        assert loader.stats["empty"] == 1
+        assert loader.stats["ocr"] == 0
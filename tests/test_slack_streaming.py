@@ -0,0 +1,174 @@
+"""
+Tests for streaming answers into Slack messages
+"""
+
+import os
+import asyncio
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+from langchain_core.language_models import FakeListChatModel
+
+os.environ.setdefault("SLACK_SIGNING_SECRET", "test_secret")
+os.environ.setdefault("SLACK_BOT_TOKEN", "test_token")
+
+from app.slack_streaming import SlackMessageStreamer
+from app.core_agent import CoreAgent, Config
+
+
+class TestSlackMessageStreamer:
+    """Test suite for SlackMessageStreamer"""
+
+    @pytest.mark.asyncio
+    async def test_first_token_is_shown_immediately(self):
+        """The first partial answer is pushed without waiting for the cadence"""
+        client = MagicMock()
+        client.chat_update = AsyncMock()
+        streamer = SlackMessageStreamer(client, "C1", "1.0", prefix="<@U1> ")
+
+        await streamer.update("Hel")
+        await streamer.finish("<@U1> Hello")
+
+        first, final = client.chat_update.call_args_list
+        assert first.kwargs["text"].startswith("<@U1> Hel")
+        assert final.kwargs == {"channel": "C1", "ts": "1.0", "text": "<@U1> Hello"}
+
+    @pytest.mark.asyncio
+    async def test_updates_are_rate_limited(self):
+        """Tokens arriving faster than the cadence are batched into few updates"""
+        client = MagicMock()
+        client.chat_update = AsyncMock()
+        streamer = SlackMessageStreamer(
+            client, "C1", "1.0", min_interval=60, min_tokens=10
+        )
+
+        text = ""
+        for i in range(25):
+            text += f"t{i} "
+            await streamer.update(text)
+            # Let the background update complete, as a real token stream would
+            await asyncio.sleep(0)
+        await streamer.finish(text)
+
+        # First token, every 10th token after it, then the final reply
+        assert client.chat_update.await_count == 4
+        assert client.chat_update.call_args.kwargs["text"] == text
+
+    @pytest.mark.asyncio
+    async def test_update_failure_does_not_raise(self):
+        """Slack API errors are logged, never propagated into generation"""
+        client = MagicMock()
+        client.chat_update = AsyncMock(side_effect=Exception("ratelimited"))
+        streamer = SlackMessageStreamer(client, "C1", "1.0")
+
+        await streamer.update("partial")
+        finished = await streamer.finish("final")
+
+        assert not finished
+        assert streamer.updates_sent == 0
+
+
+class TestStreamingGeneration:
+    """Test token streaming through the agent and the Slack handler"""
+
+    @pytest.fixture
+    @patch("app.core_agent.GoogleGenerativeAIEmbeddings")
+    @patch("app.core_agent.chromadb.HttpClient")
+    @patch("app.core_agent.Chroma")
+    @patch("app.core_agent.ChatOllama")
+    @patch("app.core_agent.TavilySearchResults")
+    def mock_agent(
+        self, mock_tavily, mock_ollama, mock_chroma, mock_http_client, mock_embeddings
+    ):
+        return CoreAgent(Config())
+
+    @pytest.mark.asyncio
+    async def test_generate_answer_streams_partial_text(self, mock_agent):
+        """on_token receives the accumulated answer as it is generated"""
+        mock_agent.llm_text = FakeListChatModel(responses=["abc"])
+        partials = []
+
+        async def on_token(text):
+            partials.append(text)
+
+        state = {"question": "q", "documents": ["doc"], "source": "vectorstore"}
+        result = await mock_agent.generate_answer(
+            state, config={"configurable": {"on_token": on_token}}
+        )
+
+        assert result["generation"] == "abc"
+        assert partials == ["a", "ab", "abc"]
+
+    @pytest.mark.asyncio
+    async def test_background_task_finishes_streamed_message(self):
+        """With a streamer the final answer edits the message instead of posting"""
+        from app.main import process_question_background
+
+        agent = MagicMock()
+        agent.process_question = AsyncMock(
+            return_value={"generation": "answer", "status": "completed"}
+        )
+        streamer = MagicMock()
+        streamer.finish = AsyncMock()
+        say = AsyncMock()
+
+        with patch("app.main.get_agent", return_value=agent):
+            await process_question_background("q", "U1", say, MagicMock(), streamer)
+
+        agent.process_question.assert_awaited_once_with("q", on_token=streamer.update)
+        streamer.finish.assert_awaited_once_with("<@U1> answer")
+        say.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_background_task_failure_replaces_streamed_message(self):
+        """A failure mid-stream overwrites the partial answer with the error"""
+        from app.main import process_question_background
+
+        agent = MagicMock()
+        agent.process_question = AsyncMock(side_effect=RuntimeError("boom"))
+        streamer = MagicMock()
+        streamer.finish = AsyncMock()
+        say = AsyncMock()
+
+        with patch("app.main.get_agent", return_value=agent):
+            await process_question_background("q", "U1", say, MagicMock(), streamer)
+
+        streamer.finish.assert_awaited_once()
+        assert "錯誤" in streamer.finish.await_args.args[0]
+        say.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_background_task_posts_answer_if_message_cannot_be_edited(self):
+        """A final chat_update that fails doesn't lose the answer"""
+        from app.main import process_question_background
+
+        agent = MagicMock()
+        agent.process_question = AsyncMock(
+            return_value={"generation": "answer", "status": "completed"}
+        )
+        client = MagicMock()
+        client.chat_update = AsyncMock(side_effect=Exception("message_not_found"))
+        streamer = SlackMessageStreamer(client, "C1", "1.0")
+        say = AsyncMock()
+
+        with patch("app.main.get_agent", return_value=agent):
+            await process_question_background("q", "U1", say, MagicMock(), streamer)
+
+        client.chat_update.assert_awaited_once()
+        say.assert_awaited_once_with("<@U1> answer")
+
+    @pytest.mark.asyncio
+    async def test_background_task_failure_posts_if_message_cannot_be_edited(self):
+        from app.main import process_question_background
+
+        agent = MagicMock()
+        agent.process_question = AsyncMock(side_effect=RuntimeError("boom"))
+        client = MagicMock()
+        client.chat_update = AsyncMock(side_effect=Exception("ratelimited"))
+        streamer = SlackMessageStreamer(client, "C1", "1.0")
+        say = AsyncMock()
+
+        with patch("app.main.get_agent", return_value=agent):
+            await process_question_background("q", "U1", say, MagicMock(), streamer)
+
+        say.assert_awaited_once()
+        assert "錯誤" in say.await_args.args[0]
@@ -0,0 +1,94 @@
+"""
+Tests for the sentence-aware text splitter
+"""
+
+import pytest
+from langchain_core.documents import Document
+from app.text_splitter import SentenceSplitter, approx_token_length, make_splitter
+
+SENTENCES = [
+    "員工請假應於三個工作日前透過人事系統提出申請。",
+    "經直屬主管核准後始得休假！",
+    "病假超過三日者須檢附診斷證明書？",
+    "The HR portal logs every approval. ",
+    "特別休假依勞動基準法規定辦理；",
+    "年資滿一年者給予七日。",
+]
+TEXT = "".join(SENTENCES)
+
+
+class TestSentenceSplitter:
+    """Test suite for SentenceSplitter"""
+
+    def test_chunks_end_on_sentence_boundaries(self):
+        """zh-TW and English sentences are never cut in the middle"""
+        splitter = SentenceSplitter(chunk_size=60, chunk_overlap=0)
+
+        chunks = splitter.split_text(TEXT)
+
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 60 for chunk in chunks)
+        for chunk in chunks:
+            assert chunk.endswith(("。", "！", "？", ".", "；"))
+        assert "".join(chunks).replace(" ", "") == TEXT.replace(" ", "")
+
+    def test_overlap_repeats_whole_sentences(self):
+        """The next chunk starts with the previous chunk's last sentence"""
+        splitter = SentenceSplitter(chunk_size=50, chunk_overlap=25)
+
+        first, second = splitter.split_text(TEXT)[:2]
+
+        assert second.startswith(SENTENCES[1])
+        assert first.endswith(SENTENCES[1])
+
+    def test_line_wraps_are_not_sentence_ends(self):
+        """Single newlines inside a sentence (PDF wrapping) keep it whole"""
+        wrapped = "員工請假應於三個工作日前透過\n人事系統提出申請。經直屬主管\n核准後始得休假。"
+        splitter = SentenceSplitter(chunk_size=25, chunk_overlap=0)
+
+        assert splitter.split_text(wrapped) == [
+            "員工請假應於三個工作日前透過\n人事系統提出申請。",
+            "經直屬主管\n核准後始得休假。",
+        ]
+
+    def test_overlong_sentence_breaks_at_commas_then_hard(self):
+        """A sentence longer than a chunk is split at clauses, then cut"""
+        splitter = SentenceSplitter(chunk_size=10, chunk_overlap=0)
+
+        chunks = splitter.split_text("甲乙丙丁戊，己庚辛壬癸子丑寅卯辰巳午未申酉。")
+
+        assert chunks == ["甲乙丙丁戊，", "己庚辛壬癸子丑寅卯辰", "巳午未申酉。"]
+
+    def test_start_index_is_exact(self):
+        """Every chunk's start_index points at its text in the document"""
+        splitter = SentenceSplitter(
+            chunk_size=40, chunk_overlap=20, add_start_index=True
+        )
+
+        docs = splitter.split_documents(
+            [Document(page_content=TEXT, metadata={"p": 1})]
+        )
+
+        for doc in docs:
+            start = doc.metadata["start_index"]
+            assert TEXT[start : start + len(doc.page_content)] == doc.page_content
+            assert doc.metadata["p"] == 1
+
+
+class TestTokenLength:
+    """Test token-based chunk lengths"""
+
+    def test_approx_tokens_count_cjk_characters_and_words(self):
+        assert approx_token_length("Leave requests 員工請假.") == 7
+        assert approx_token_length("SOP標準") == 3
+
+    def test_token_splitter_respects_token_budget(self):
+        splitter = make_splitter(chunk_size=20, chunk_overlap=0, length="tokens")
+
+        chunks = splitter.split_text(TEXT)
+
+        assert all(approx_token_length(chunk) <= 20 for chunk in chunks)
+
+    def test_unknown_length_unit_is_rejected(self):
+        with pytest.raises(ValueError):
+            make_splitter(length="words")
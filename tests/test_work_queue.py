@@ -0,0 +1,144 @@
+"""
+Tests for the bounded question work queue
+"""
+
+import os
+import asyncio
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+os.environ.setdefault("SLACK_SIGNING_SECRET", "test_secret")
+os.environ.setdefault("SLACK_BOT_TOKEN", "test_token")
+
+from app.work_queue import WorkQueue, QueueFullError
+
+
+class TestWorkQueue:
+    """Test suite for WorkQueue"""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded_by_workers(self):
+        """No more than `workers` jobs run at the same time"""
+        queue = WorkQueue(workers=2, max_depth=10)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+
+        for _ in range(6):
+            queue.submit(job)
+        await queue.join()
+        await queue.stop()
+
+        assert peak == 2
+        assert queue.stats()["processed"] == 6
+
+    @pytest.mark.asyncio
+    async def test_positions_and_rejection(self):
+        """Jobs beyond the idle workers get a position; a full queue rejects"""
+        queue = WorkQueue(workers=1, max_depth=2)
+        release = asyncio.Event()
+
+        async def job():
+            await release.wait()
+
+        assert queue.submit(job) == 0
+        await asyncio.sleep(0)  # let the worker pick up the first job
+        assert queue.submit(job) == 1
+        assert queue.submit(job) == 2
+        assert queue.is_full()
+
+        with pytest.raises(QueueFullError):
+            queue.submit(job)
+
+        stats = queue.stats()
+        assert stats["depth"] == 2
+        assert stats["in_flight"] == 1
+        assert stats["rejected"] == 1
+
+        release.set()
+        await queue.join()
+        await queue.stop()
+        assert queue.stats()["max_wait_seconds"] > 0
+
+    @pytest.mark.asyncio
+    async def test_failing_job_does_not_kill_worker(self):
+        """A job raising an exception is counted and the worker keeps going"""
+        queue = WorkQueue(workers=1, max_depth=5)
+        done = []
+
+        async def bad_job():
+            raise RuntimeError("boom")
+
+        async def good_job():
+            done.append(True)
+
+        queue.submit(bad_job)
+        queue.submit(good_job)
+        await queue.join()
+        await queue.stop()
+
+        assert done == [True]
+        assert queue.stats()["failed"] == 1
+
+
+class TestMentionAdmission:
+    """Test how the Slack mention handler takes queue slots"""
+
+    @pytest.mark.asyncio
+    async def test_slot_is_reserved_before_acknowledging(self):
+        """A mention acknowledged as queued is never rejected afterwards"""
+        from app import main
+
+        queue = WorkQueue(workers=1, max_depth=1)
+        release = asyncio.Event()
+
+        async def busy():
+            await release.wait()
+
+        queue.submit(busy)
+        await asyncio.sleep(0)  # the only worker is now busy
+
+        # Posting the first acknowledgment takes a while
+        ack_posted = asyncio.Event()
+
+        async def slow_say(text):
+            await ack_posted.wait()
+            return {"ts": "1.0", "channel": "C1"}
+
+        first_say = AsyncMock(side_effect=slow_say)
+        second_say = AsyncMock(return_value={"ts": "2.0", "channel": "C1"})
+        process = AsyncMock()
+
+        def mention(user):
+            return {"event": {"text": "<@BOT> q", "user": user, "channel": "C1"}}
+
+        with patch.object(main, "question_queue", queue), patch.object(
+            main, "process_question_background", process
+        ):
+            first = asyncio.create_task(
+                main.handle_app_mentions(
+                    mention("U1"), first_say, MagicMock(), MagicMock()
+                )
+            )
+            await asyncio.sleep(0)
+            await main.handle_app_mentions(
+                mention("U2"), second_say, MagicMock(), MagicMock()
+            )
+            ack_posted.set()
+            await first
+            release.set()
+            await queue.join()
+            await queue.stop()
+
+        first_say.assert_awaited_once()
+        assert "第 1 位" in first_say.await_args.args[0]
+        second_say.assert_awaited_once_with(main.BUSY_MESSAGE.format(user_id="U2"))
+        process.assert_awaited_once()
+        assert process.await_args.args[:2] == ("q", "U1")
+        assert process.await_args.args[4].ts == "1.0"